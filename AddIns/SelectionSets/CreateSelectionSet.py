@@ -1,9 +1,77 @@
 import adsk.core
 import adsk.fusion
+import csv
+import json
+import time
 import traceback
 
+from . import assembly_snapshot
+from . import bulk_actions
+from . import entity_index
+from . import handler_registry
+from . import name_matching
+from . import set_snapshot
+from . import tagging
+from . import time_slicing
+from . import tracing
+
 # Global set of event handlers to keep them referenced for the duration of the command
-handlers = []
+handlers = handler_registry.HandlerRegistry()
+
+# Commands defined by this add-in; completing one of them never changes the model
+COMMAND_IDS = ('FindBodiesCreateSelectionSet', 'FindBodiesBatch', 'SyncSelectionSets', 'RebuildBodyIndex',
+               'ExportSelectionSets', 'ImportSelectionSets', 'ExportAssemblySnapshot',
+               'TagBodies', 'FindTaggedBodies', 'SelectionSetActions')
+
+# Commands known not to edit the model: navigation, selection and inspection
+# in Fusion, and the ToggleCamera Add-In's camera commands. Any other
+# completed command throws the entity index away
+READ_ONLY_COMMAND_IDS = frozenset((
+    'SelectCommand', 'MeasureCommand',
+    'PanCommand', 'ZoomCommand', 'ZoomWindowCommand', 'FitCommand',
+    'OrbitCommand', 'FreeOrbitCommand', 'ConstrainedOrbitCommand', 'LookAtCommand',
+    'CameraToggle', 'CameraToggleAnimated', 'CameraSetAllOrtho', 'CameraSetAllPersp',
+))
+
+# Attribute on each selection set recording the search that fills it
+QUERY_ATTRIBUTE_GROUP = 'EmbergleamSelectionSets'
+QUERY_ATTRIBUTE_NAME = 'query'
+
+# Labels shown in the Match drop-down and the name_matching mode each selects
+MATCH_MODE_LABELS = {
+    'Exact name': name_matching.EXACT,
+    'Starts with': name_matching.PREFIX,
+    'Wildcard (* ?)': name_matching.GLOB,
+    'Regular expression': name_matching.REGEX,
+}
+
+# Labels shown in the Search For drop-down and the entity_index type each selects
+ENTITY_TYPE_LABELS = {
+    'Bodies': entity_index.BODY,
+    'Occurrences': entity_index.OCCURRENCE,
+    'Sketches': entity_index.SKETCH,
+    'Construction Planes': entity_index.CONSTRUCTION_PLANE,
+    'Joints': entity_index.JOINT,
+}
+
+# Labels shown in the Action drop-down of Change Selection Set Members and the
+# bulk_actions action each selects
+ACTION_LABELS = {
+    'Show': bulk_actions.SHOW,
+    'Hide': bulk_actions.HIDE,
+    'Light Bulb On': bulk_actions.LIGHT_BULB_ON,
+    'Light Bulb Off': bulk_actions.LIGHT_BULB_OFF,
+    'Set Appearance': bulk_actions.APPEARANCE,
+}
+
+# Singular and plural nouns used in messages for each entity type
+ENTITY_NOUNS = {
+    entity_index.BODY: ('body', 'bodies'),
+    entity_index.OCCURRENCE: ('occurrence', 'occurrences'),
+    entity_index.SKETCH: ('sketch', 'sketches'),
+    entity_index.CONSTRUCTION_PLANE: ('construction plane', 'construction planes'),
+    entity_index.JOINT: ('joint', 'joints'),
+}
 
 def run(context):
     ui = None
@@ -17,13 +85,128 @@ def run(context):
             cmdDef = ui.commandDefinitions.addButtonDefinition(
                 'FindBodiesCreateSelectionSet',
                 'Find Bodies and Create Selection Set',
-                'Search for bodies by name and create a selection set',
+                'Search for bodies, occurrences, sketches, construction planes or joints by name and create a selection set',
                 '')
         
         # Connect to the command created event
         onCommandCreated = FindBodiesCommandCreatedHandler()
         cmdDef.commandCreated.add(onCommandCreated)
-        handlers.append(onCommandCreated)
+        handlers.keep(onCommandCreated)
+        
+        # Batch command that creates a selection set for each name in a list
+        batchCmdDef = ui.commandDefinitions.itemById('FindBodiesBatch')
+        if not batchCmdDef:
+            batchCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'FindBodiesBatch',
+                'Find Bodies and Create Selection Sets (Batch)',
+                'Create a selection set for each body name in a list or file',
+                '')
+        onBatchCreated = FindBodiesBatchCommandCreatedHandler()
+        batchCmdDef.commandCreated.add(onBatchCreated)
+        handlers.keep(onBatchCreated)
+        
+        # Command that refreshes every selection set made by this add-in
+        syncCmdDef = ui.commandDefinitions.itemById('SyncSelectionSets')
+        if not syncCmdDef:
+            syncCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'SyncSelectionSets',
+                'Sync All Selection Sets',
+                'Refresh every selection set made by Find Bodies in one pass',
+                '')
+        onSyncCreated = SyncSelectionSetsCommandCreatedHandler()
+        syncCmdDef.commandCreated.add(onSyncCreated)
+        handlers.keep(onSyncCreated)
+        
+        # Commands that tag bodies and make selection sets from the tags
+        tagCmdDef = ui.commandDefinitions.itemById('TagBodies')
+        if not tagCmdDef:
+            tagCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'TagBodies',
+                'Tag Bodies',
+                'Tag every body matching a name so it can be found later without a search',
+                '')
+        onTagCreated = TagBodiesCommandCreatedHandler()
+        tagCmdDef.commandCreated.add(onTagCreated)
+        handlers.keep(onTagCreated)
+        
+        findTaggedCmdDef = ui.commandDefinitions.itemById('FindTaggedBodies')
+        if not findTaggedCmdDef:
+            findTaggedCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'FindTaggedBodies',
+                'Find Tagged Bodies and Create Selection Set',
+                'Create a selection set of the bodies with a tag, without walking the assembly',
+                '')
+        onFindTaggedCreated = FindTaggedBodiesCommandCreatedHandler()
+        findTaggedCmdDef.commandCreated.add(onFindTaggedCreated)
+        handlers.keep(onFindTaggedCreated)
+        
+        # Command that shows, hides or restyles every member of a selection set
+        actionsCmdDef = ui.commandDefinitions.itemById('SelectionSetActions')
+        if not actionsCmdDef:
+            actionsCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'SelectionSetActions',
+                'Change Selection Set Members',
+                'Show, hide, switch light bulbs or set the appearance of every member of a selection set',
+                '')
+        onActionsCreated = SelectionSetActionsCommandCreatedHandler()
+        actionsCmdDef.commandCreated.add(onActionsCreated)
+        handlers.keep(onActionsCreated)
+        
+        # Command to throw away the entity index and walk the assembly again
+        rebuildCmdDef = ui.commandDefinitions.itemById('RebuildBodyIndex')
+        if not rebuildCmdDef:
+            rebuildCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'RebuildBodyIndex',
+                'Rebuild Name Index',
+                'Rebuild the entity name index used by Find Bodies',
+                '')
+        onRebuildCreated = RebuildIndexCommandCreatedHandler()
+        rebuildCmdDef.commandCreated.add(onRebuildCreated)
+        handlers.keep(onRebuildCreated)
+        
+        # Commands that save every selection set to a file and restore them
+        exportCmdDef = ui.commandDefinitions.itemById('ExportSelectionSets')
+        if not exportCmdDef:
+            exportCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'ExportSelectionSets',
+                'Export Selection Sets',
+                'Save every selection set in the design to a snapshot file',
+                '')
+        onExportCreated = ExportSelectionSetsCommandCreatedHandler()
+        exportCmdDef.commandCreated.add(onExportCreated)
+        handlers.keep(onExportCreated)
+        
+        importCmdDef = ui.commandDefinitions.itemById('ImportSelectionSets')
+        if not importCmdDef:
+            importCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'ImportSelectionSets',
+                'Import Selection Sets',
+                'Restore the selection sets saved in a snapshot file',
+                '')
+        onImportCreated = ImportSelectionSetsCommandCreatedHandler()
+        importCmdDef.commandCreated.add(onImportCreated)
+        handlers.keep(onImportCreated)
+        
+        # Command that writes the assembly tree for searching outside Fusion
+        snapshotCmdDef = ui.commandDefinitions.itemById('ExportAssemblySnapshot')
+        if not snapshotCmdDef:
+            snapshotCmdDef = ui.commandDefinitions.addButtonDefinition(
+                'ExportAssemblySnapshot',
+                'Export Assembly Snapshot',
+                'Save the occurrence tree and entity names for Tools/query_snapshots.py',
+                '')
+        onSnapshotCreated = ExportAssemblySnapshotCommandCreatedHandler()
+        snapshotCmdDef.commandCreated.add(onSnapshotCreated)
+        handlers.keep(onSnapshotCreated)
+        
+        # Keep the entity index in step with the open documents
+        onCommandTerminated = CommandTerminatedHandler()
+        ui.commandTerminated.add(onCommandTerminated)
+        handlers.keep(onCommandTerminated)
+        
+        onDocumentClosing = DocumentClosingHandler()
+        app.documentClosing.add(onDocumentClosing)
+        handlers.keep(onDocumentClosing)
         
         # Execute the command
         cmdDef.execute()
@@ -42,10 +225,21 @@ def stop(context):
         app = adsk.core.Application.get()
         ui = app.userInterface
         
-        # Delete the command definition
-        cmdDef = ui.commandDefinitions.itemById('FindBodiesCreateSelectionSet')
-        if cmdDef:
-            cmdDef.deleteMe()
+        # Disconnect the index events
+        for handler in handlers:
+            if isinstance(handler, CommandTerminatedHandler):
+                ui.commandTerminated.remove(handler)
+            elif isinstance(handler, DocumentClosingHandler):
+                app.documentClosing.remove(handler)
+        handlers.clear()
+        time_slicing.cancel()
+        entity_index.clear()
+        
+        # Delete the command definitions
+        for cmd_id in COMMAND_IDS:
+            cmdDef = ui.commandDefinitions.itemById(cmd_id)
+            if cmdDef:
+                cmdDef.deleteMe()
         
     except:
         if ui:
@@ -56,12 +250,27 @@ class FindBodiesCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
     def __init__(self):
         super().__init__()
     
+    @tracing.traced_handler
     def notify(self, args):
         try:
             cmd = args.command
+            
+            # Inputs for the name or pattern to search for
+            inputs = cmd.commandInputs
+            add_name_inputs(inputs)
+            entityTypesInput = inputs.addDropDownCommandInput(
+                'entityTypes', 'Search for', adsk.core.DropDownStyles.CheckBoxDropDownStyle)
+            for label, entity_type in ENTITY_TYPE_LABELS.items():
+                entityTypesInput.listItems.add(label, entity_type == entity_index.BODY)
+            
+            # Optional occurrences to search inside instead of the whole design
+            scopeInput = inputs.addSelectionInput(
+                'scope', 'Within', 'Select occurrences to search inside, or none for the whole design')
+            scopeInput.addSelectionFilter('Occurrences')
+            scopeInput.setSelectionLimits(0)
+            
             onExecute = FindBodiesCommandExecuteHandler()
-            cmd.execute.add(onExecute)
-            handlers.append(onExecute)
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
             
         except:
             app = adsk.core.Application.get()
@@ -74,6 +283,7 @@ class FindBodiesCommandExecuteHandler(adsk.core.CommandEventHandler):
     def __init__(self):
         super().__init__()
     
+    @tracing.traced_handler
     def notify(self, args):
         ui = None
         try:
@@ -85,101 +295,1199 @@ class FindBodiesCommandExecuteHandler(adsk.core.CommandEventHandler):
                 ui.messageBox('No active Fusion design found.')
                 return
             
-            # Get the body name to search for from user
-            body_name, cancelled = ui.inputBox('Enter the exact body name to search for:', 
-                                               'Find Bodies', '')
-            
-            if cancelled or not body_name.strip():
-                return
-            
-            body_name = body_name.strip()
-            
-            # Find all matching bodies (as proxies in assembly context)
-            matching_bodies = []
-            root_comp = design.rootComponent
-            
-            # Check root component bodies
-            for body in root_comp.bRepBodies:
-                if body.name == body_name:
-                    matching_bodies.append(body)
-            
-            # Check bodies in all occurrences
-            all_occurrences = root_comp.allOccurrences
-            for occ in all_occurrences:
-                if occ.component:
-                    for body in occ.component.bRepBodies:
-                        if body.name == body_name:
-                            # Create proxy for the body in the occurrence context
-                            body_proxy = body.createForAssemblyContext(occ)
-                            matching_bodies.append(body_proxy)
-            
-            # If no bodies found, show message and exit
-            if len(matching_bodies) == 0:
-                ui.messageBox(f'No bodies found with the name "{body_name}".')
-                return
-            
-            # Create plural name for selection set
-            plural_name = make_plural(body_name)
-            
-            # Get or create the selection set
-            selection_sets = design.selectionSets
-            selection_set = None
-            action = "created"
-            
-            # Variables for tracking changes
-            old_count = 0
-            renamed_count = 0
-            unchanged_count = 0
-            added_count = 0
-            
-            # Check if selection set already exists
-            for ss in selection_sets:
-                if ss.name == plural_name:
-                    selection_set = ss
-                    action = "updated"
-                    
-                    # Analyze the old selection set before deleting
-                    old_entities = selection_set.entities
-                    old_count = len(old_entities)
-                    
-                    # Count how many items have been renamed (don't match the search name)
-                    for i in range(len(old_entities)):
-                        item = old_entities[i]
-                        # Check if it's a BRepBody and if its name doesn't match
-                        if hasattr(item, 'name') and item.name != body_name:
-                            renamed_count += 1
-                    
-                    # Calculate unchanged count
-                    unchanged_count = old_count - renamed_count
-                    
-                    break
-            
-            # Delete existing selection set if found
-            if selection_set:
-                selection_set.deleteMe()
-            
-            # Create new selection set with all matching bodies
-            selection_set = selection_sets.add(matching_bodies, plural_name)
+            # Get the body name or pattern to search for from the command inputs
+            inputs = args.command.commandInputs
+            pattern = read_name_pattern(ui, inputs)
+            if not pattern:
+                return
+            
+            entity_types = tuple(ENTITY_TYPE_LABELS[item.name]
+                                 for item in inputs.itemById('entityTypes').listItems if item.isSelected)
+            if not entity_types:
+                ui.messageBox('Choose at least one kind of entity to search for.')
+                return
+            
+            scopeInput = inputs.itemById('scope')
+            scope = [scopeInput.selection(i).entity for i in range(scopeInput.selectionCount)]
+            scope_paths = [occ.fullPathName for occ in scope] or None
+            
+            # Search once the entity index is up to date
+            query = search_query(pattern, entity_types, scope_paths)
+            when_indexed(design, lambda index: create_selection_set(ui, design, index, query), scope=scope)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+def add_name_inputs(inputs):
+    """
+    Add the body name, match mode and ignore case inputs to a command dialog.
+    """
+    inputs.addStringValueInput('bodyName', 'Body name', '')
+    matchModeInput = inputs.addDropDownCommandInput(
+        'matchMode', 'Match', adsk.core.DropDownStyles.TextListDropDownStyle)
+    for label in MATCH_MODE_LABELS:
+        matchModeInput.listItems.add(label, label == 'Exact name')
+    inputs.addBoolValueInput('ignoreCase', 'Ignore case', True, '', False)
+
+
+def read_name_pattern(ui, inputs):
+    """
+    Return the NamePattern given by the inputs from add_name_inputs(), or
+    None if no name was given or the pattern is invalid.
+    """
+    body_name = inputs.itemById('bodyName').value.strip()
+    if not body_name:
+        return None
+    
+    try:
+        return name_matching.NamePattern(
+            body_name,
+            MATCH_MODE_LABELS[inputs.itemById('matchMode').selectedItem.name],
+            inputs.itemById('ignoreCase').value)
+    except ValueError as e:
+        ui.messageBox(str(e))
+        return None
+
+
+class FindBodiesBatchCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = FindBodiesBatchCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class FindBodiesBatchCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Creates one selection set per name in a list, using a single walk of the
+    assembly for all of them.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
             
-            # Calculate added count
-            new_count = len(matching_bodies)
-            added_count = new_count - unchanged_count
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            # Names can be typed in directly or read from a file
+            names_text, cancelled = ui.inputBox(
+                'Enter the body names separated by commas,\n' +
+                'or leave blank to load them from a text/CSV file:',
+                'Find Bodies (Batch)', '')
+            if cancelled:
+                return
             
-            # Show success message
-            if action == "created":
-                ui.messageBox(f'Found {new_count} {"body" if new_count == 1 else "bodies"} ' +
-                             f'and created selection set: "{plural_name}"')
+            if names_text.strip():
+                body_names = parse_name_list(names_text)
             else:
-                message = f'Updated selection set: "{plural_name}"\n'
-                message += f'Added {added_count}, Removed {renamed_count} (renamed), Unchanged {unchanged_count}\n'
-                message += f'Total: {new_count} {"body" if new_count == 1 else "bodies"}'
-                ui.messageBox(message)
+                file_dialog = ui.createFileDialog()
+                file_dialog.title = 'Load Body Names'
+                file_dialog.filter = 'Name lists (*.txt;*.csv);;All files (*.*)'
+                file_dialog.isMultiSelectEnabled = False
+                if file_dialog.showOpen() != adsk.core.DialogResults.DialogOK:
+                    return
+                body_names = read_name_file(file_dialog.filename)
+            
+            if not body_names:
+                ui.messageBox('No body names were given.')
+                return
+            
+            # One walk of the assembly serves every name in the list
+            start_time = time.perf_counter()
+            when_indexed(design, lambda index: create_selection_sets(
+                ui, design, index, body_names, start_time))
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class SyncSelectionSetsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = SyncSelectionSetsCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class SyncSelectionSetsCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Refreshes every selection set made by this add-in from a single walk of
+    the assembly.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            start_time = time.perf_counter()
+            when_indexed(design, lambda index: sync_selection_sets(ui, design, index, start_time))
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class TagBodiesCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            inputs = cmd.commandInputs
+            add_name_inputs(inputs)
+            inputs.addStringValueInput('tag', 'Tag', '')
+            
+            onExecute = TagBodiesCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class TagBodiesCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Tags the native bodies matching a name, once per component however many
+    occurrences the component has.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            inputs = args.command.commandInputs
+            pattern = read_name_pattern(ui, inputs)
+            if not pattern:
+                return
+            tag = inputs.itemById('tag').value.strip()
+            if not tag:
+                ui.messageBox('Enter the tag to give the bodies.')
+                return
+            
+            def tag_bodies(index):
+                bodies = index.find_native(pattern)
+                if not bodies:
+                    ui.messageBox(f'No bodies found {pattern.describe()}.')
+                    return
+                changed_count = tagging.tag_entities(bodies, tag)
+                ui.messageBox(f'Tagged {len(bodies)} {"body" if len(bodies) == 1 else "bodies"} ' +
+                              f'"{tag}" ({changed_count} newly tagged)')
+            
+            when_indexed(design, tag_bodies)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class FindTaggedBodiesCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            app = adsk.core.Application.get()
+            cmd = args.command
+            
+            # Offer the tags already used in the design
+            tagInput = cmd.commandInputs.addDropDownCommandInput(
+                'tag', 'Tag', adsk.core.DropDownStyles.TextListDropDownStyle)
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            if design:
+                for i, tag in enumerate(tagging.tag_values(design)):
+                    tagInput.listItems.add(tag, i == 0)
+            
+            onExecute = FindTaggedBodiesCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class FindTaggedBodiesCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Creates or updates the selection set of the bodies with a tag, found with
+    Fusion's attribute query rather than the entity index.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            selected = args.command.commandInputs.itemById('tag').selectedItem
+            if not selected:
+                ui.messageBox('No bodies in this design are tagged yet, use Tag Bodies first.')
+                return
+            
+            create_selection_set(ui, design, None, tag_query(selected.name))
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class SelectionSetActionsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            app = adsk.core.Application.get()
+            cmd = args.command
+            inputs = cmd.commandInputs
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            setInput = inputs.addDropDownCommandInput(
+                'selectionSet', 'Selection set', adsk.core.DropDownStyles.TextListDropDownStyle)
+            actionInput = inputs.addDropDownCommandInput(
+                'action', 'Action', adsk.core.DropDownStyles.TextListDropDownStyle)
+            for label in ACTION_LABELS:
+                actionInput.listItems.add(label, label == 'Hide')
+            appearanceInput = inputs.addDropDownCommandInput(
+                'appearance', 'Appearance', adsk.core.DropDownStyles.TextListDropDownStyle)
+            appearanceInput.isVisible = False
+            
+            if design:
+                for i, selection_set in enumerate(design.selectionSets):
+                    setInput.listItems.add(selection_set.name, i == 0)
+                for i, appearance in enumerate(design.appearances):
+                    appearanceInput.listItems.add(appearance.name, i == 0)
+            
+            onInputChanged = SelectionSetActionsInputChangedHandler()
+            handlers.add_to_command(cmd, cmd.inputChanged, onInputChanged)
+            onExecute = SelectionSetActionsCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
             
         except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
             if ui:
                 ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+class SelectionSetActionsInputChangedHandler(adsk.core.InputChangedEventHandler):
+    """
+    Only shows the appearance input when the action is Set Appearance.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        try:
+            if args.input.id != 'action':
+                return
+            inputs = args.inputs
+            action = ACTION_LABELS[inputs.itemById('action').selectedItem.name]
+            inputs.itemById('appearance').isVisible = action == bulk_actions.APPEARANCE
+            
+        except:
+            print('Failed in SelectionSetActionsInputChangedHandler:\n{}'.format(traceback.format_exc()))
+
+
+class SelectionSetActionsCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Applies an action to every member of a selection set as one batch, with
+    a single viewport refresh at the end.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            inputs = args.command.commandInputs
+            set_item = inputs.itemById('selectionSet').selectedItem
+            if not set_item:
+                ui.messageBox('The design has no selection sets.')
+                return
+            selection_set = design.selectionSets.itemByName(set_item.name)
+            action_label = inputs.itemById('action').selectedItem.name
+            action = ACTION_LABELS[action_label]
+            
+            appearance = None
+            if action == bulk_actions.APPEARANCE:
+                appearance_item = inputs.itemById('appearance').selectedItem
+                if not appearance_item:
+                    ui.messageBox('The design has no appearances to apply.')
+                    return
+                appearance = design.appearances.itemByName(appearance_item.name)
+            
+            with tracing.span('SelectionSet.entities'):
+                entities = selection_set.entities
+            change = bulk_actions.plan(entities, action, appearance)
+            
+            # Light bulbs and appearances belong to the native entity, so
+            # changing them can reach instances that are not in the set
+            if change.outside_count:
+                answer = ui.messageBox(
+                    f'{action_label} will also change {change.outside_count} ' +
+                    f'{"instance" if change.outside_count == 1 else "instances"} ' +
+                    f'that {"is" if change.outside_count == 1 else "are"} not in ' +
+                    f'"{selection_set.name}", as they share a component with its members.\n\n' +
+                    'Change them as well?',
+                    'Change Selection Set Members',
+                    adsk.core.MessageBoxButtonTypes.YesNoButtonType,
+                    adsk.core.MessageBoxIconTypes.WarningIconType)
+                if answer != adsk.core.DialogResults.DialogYes:
+                    return
+            
+            bulk_actions.apply(change)
+            
+            # One redraw for the whole batch
+            if change.writes:
+                app.activeViewport.refresh()
+            
+            message = f'{action_label}: "{selection_set.name}", {len(entities)} ' + \
+                      f'{"member" if len(entities) == 1 else "members"} in {change.group_count} ' + \
+                      f'{"component" if change.group_count == 1 else "components"}\n'
+            message += f'Changed {change.changed_count}, Already set {change.unchanged_count}'
+            if change.unsupported_count:
+                message += f', Not applicable {change.unsupported_count}'
+            message += f'\nInstances changed in the design: {change.instance_count}'
+            if change.outside_count:
+                message += f' ({change.outside_count} outside the set)'
+            if change.parent_count:
+                message += f'\nParent occurrences switched on: {change.parent_count}'
+            ui.messageBox(message)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ExportSelectionSetsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = ExportSelectionSetsCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ExportSelectionSetsCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Saves every selection set in the design to a snapshot file.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            if design.selectionSets.count == 0:
+                ui.messageBox('The design has no selection sets to export.')
+                return
+            
+            file_dialog = ui.createFileDialog()
+            file_dialog.title = 'Export Selection Sets'
+            file_dialog.filter = set_snapshot.FILE_FILTER
+            if file_dialog.showSave() != adsk.core.DialogResults.DialogOK:
+                return
+            
+            snapshot = set_snapshot.capture(design, QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME)
+            set_snapshot.write(file_dialog.filename, snapshot)
+            
+            set_count = len(snapshot['sets'])
+            member_count = sum(len(saved_set['members']) for saved_set in snapshot['sets'])
+            ui.messageBox(f'Exported {set_count} selection {"set" if set_count == 1 else "sets"} ' +
+                          f'with {member_count} {"member" if member_count == 1 else "members"}')
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ImportSelectionSetsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = ImportSelectionSetsCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ImportSelectionSetsCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Restores the selection sets saved in a snapshot file, by entity token
+    where possible and by name otherwise.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            file_dialog = ui.createFileDialog()
+            file_dialog.title = 'Import Selection Sets'
+            file_dialog.filter = set_snapshot.FILE_FILTER
+            file_dialog.isMultiSelectEnabled = False
+            if file_dialog.showOpen() != adsk.core.DialogResults.DialogOK:
+                return
+            
+            try:
+                snapshot = set_snapshot.read(file_dialog.filename)
+            except ValueError as e:
+                ui.messageBox(str(e))
+                return
+            
+            start_time = time.perf_counter()
+            found, missing = set_snapshot.resolve_tokens(design, snapshot)
+            if not missing:
+                restore_selection_sets(ui, design, snapshot, found, 0, start_time)
+                return
+            
+            # Only the members whose tokens failed need the entity index
+            def restore_missing(index):
+                by_name = set_snapshot.resolve_by_name(index, missing)
+                found.update(by_name)
+                restore_selection_sets(ui, design, snapshot, found, len(by_name), start_time)
+            
+            when_indexed(design, restore_missing)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ExportAssemblySnapshotCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = ExportAssemblySnapshotCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class ExportAssemblySnapshotCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Writes an assembly snapshot of the active design from its entity index.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            file_dialog = ui.createFileDialog()
+            file_dialog.title = 'Export Assembly Snapshot'
+            file_dialog.filter = assembly_snapshot.FILE_FILTER
+            file_dialog.initialFilename = design.parentDocument.name + assembly_snapshot.FILE_EXTENSION
+            if file_dialog.showSave() != adsk.core.DialogResults.DialogOK:
+                return
+            path = file_dialog.filename
+            
+            def export(index):
+                write_assembly_snapshot(design, index, path)
+                ui.messageBox(f'Assembly snapshot saved to "{path}"')
+            
+            when_indexed(design, export)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class RebuildIndexCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        try:
+            cmd = args.command
+            onExecute = RebuildIndexCommandExecuteHandler()
+            handlers.add_to_command(cmd, cmd.execute, onExecute)
+            
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class RebuildIndexCommandExecuteHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            
+            if not design:
+                ui.messageBox('No active Fusion design found.')
+                return
+            
+            def report(index):
+                lines = [f'{len(index.names[entity_type])} {ENTITY_NOUNS[entity_type][0]} ' +
+                         f'{"name" if len(index.names[entity_type]) == 1 else "names"}'
+                         for entity_type in entity_index.ENTITY_TYPES]
+                ui.messageBox('Index rebuilt, unique names:\n' + '\n'.join(lines))
+            
+            when_indexed(design, report, rebuild=True)
+            
+        except:
+            if ui:
+                ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+class CommandTerminatedHandler(adsk.core.ApplicationCommandEventHandler):
+    """
+    Marks the entity index stale whenever a completed command may have
+    edited the model. Only commands in READ_ONLY_COMMAND_IDS keep it.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        try:
+            if args.commandId in COMMAND_IDS or args.commandId in READ_ONLY_COMMAND_IDS:
+                return
+            if args.terminationReason != adsk.core.CommandTerminationReason.CompletedTerminationReason:
+                return
+            
+            app = adsk.core.Application.get()
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            if design:
+                entity_index.invalidate(design)
+            
+        except:
+            print('Failed in CommandTerminatedHandler:\n{}'.format(traceback.format_exc()))
+
+
+class DocumentClosingHandler(adsk.core.DocumentEventHandler):
+    """
+    Drops the entity index of a document when it is closed.
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        try:
+            entity_index.discard(args.document)
+            
+        except:
+            print('Failed in DocumentClosingHandler:\n{}'.format(traceback.format_exc()))
+
+
+def when_indexed(design, callback, rebuild=False, scope=None):
+    """
+    Call callback(index) once the entity index of design is up to date.
+    
+    Given a list of scope occurrences and no up to date index of the whole
+    design, only their subtrees are walked, into an index used for this
+    callback alone, so a search inside one subassembly costs in proportion
+    to that subassembly.
+    
+    A stale index is loaded from the on-disk cache when the document is an
+    unchanged saved version, otherwise it is rebuilt a slice at a time
+    behind a cancellable progress dialog, so the callback may run after this
+    function has returned. If the walk is cancelled the callback is never
+    called.
+    """
+    ui = adsk.core.Application.get().userInterface
+    index = entity_index.get_index(design)
+    if not rebuild and (not index.is_stale or index.load_from_cache()):
+        callback(index)
+        return
+    
+    if scope:
+        index = entity_index.EntityIndex(design, scope)
+    
+    if time_slicing.is_running():
+        ui.messageBox('The entity index is still being built, please wait for it to finish.')
+        return
+    
+    def on_done():
+        try:
+            callback(index)
+        except:
+            ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+    
+    time_slicing.SlicedTask(index.iter_rebuild(), on_done,
+                            'Find Bodies', 'Indexing occurrence %v of %m').start()
+
+
+def export_assembly_snapshot(design, path):
+    """
+    Write an assembly snapshot of design without any dialogs, e.g. from a
+    script that opens each design of a library in turn. An out of date index
+    is loaded from the on-disk cache or rebuilt in one go.
+    """
+    index = entity_index.get_index(design)
+    if index.is_stale and not index.load_from_cache():
+        index.rebuild()
+    write_assembly_snapshot(design, index, path)
+
+
+def write_assembly_snapshot(design, index, path):
+    """
+    Write the assembly snapshot of design from its up to date index.
+    """
+    document = design.parentDocument
+    document_info = {'name': document.name}
+    data_file = document.dataFile
+    if data_file:
+        document_info['id'] = data_file.id
+        document_info['version'] = data_file.versionNumber
+    assembly_snapshot.write(path, document_info, index.component_entities, index.component_occurrences)
+
+
+def create_selection_set(ui, design, index, query):
+    """
+    Find the entities a query matches and create or update their selection
+    set. Name searches and tag lookups give the same proxies and report.
+    """
+    # Find all matching entities (as proxies in assembly context)
+    matching_entities = run_query(design, index, query)
+    entity_types = query_types(query)
+    
+    # If nothing found, show message and exit
+    if len(matching_entities) == 0:
+        ui.messageBox(f'No {entity_noun(entity_types, 2)} found {describe_query(query)}.')
+        return
+    
+    # Create or update the selection set named after the search
+    plural_name = query_set_name(query)
+    action, added_count, removed_count, unchanged_count = update_selection_set(
+        design, plural_name, matching_entities, query)
+    
+    # Show success message
+    new_count = len(matching_entities)
+    if action == "conflict":
+        ui.messageBox(f'A selection set called "{plural_name}" already holds a different search, ' +
+                      'so it was left unchanged. Rename or delete it to save this search.')
+    elif action == "created":
+        ui.messageBox(f'Found {new_count} {entity_noun(entity_types, new_count)} ' +
+                     f'and created selection set: "{plural_name}"')
+    else:
+        message = f'Updated selection set: "{plural_name}"\n'
+        message += f'Added {added_count}, Removed {removed_count}, Unchanged {unchanged_count}\n'
+        message += f'Total: {new_count} {entity_noun(entity_types, new_count)}'
+        ui.messageBox(message)
+
+
+def create_selection_sets(ui, design, index, body_names, start_time):
+    """
+    Create or update a selection set for each name in body_names and report
+    the per-set counts and the time each lookup and set update took.
+    """
+    index_time = time.perf_counter() - start_time
+    
+    lines = []
+    not_found = []
+    conflicts = []
+    for body_name in body_names:
+        name_start_time = time.perf_counter()
+        matching_bodies = index.lookup(body_name)
+        lookup_time = time.perf_counter() - name_start_time
+        if not matching_bodies:
+            not_found.append(body_name)
+            continue
+        
+        plural_name = make_plural(body_name)
+        action, added_count, removed_count, unchanged_count = update_selection_set(
+            design, plural_name, matching_bodies, search_query(name_matching.NamePattern(body_name)))
+        update_time = time.perf_counter() - name_start_time - lookup_time
+        if action == "conflict":
+            conflicts.append(plural_name)
+            continue
+        
+        line = f'{plural_name}: {len(matching_bodies)} ({action}'
+        if action == "updated":
+            line += f', +{added_count} -{removed_count} ={unchanged_count}'
+        lines.append(line + f'), lookup {lookup_time * 1000:.1f}ms, set {update_time * 1000:.1f}ms')
+    
+    total_time = time.perf_counter() - start_time
+    
+    message = f'Processed {len(body_names)} {"name" if len(body_names) == 1 else "names"} ' + \
+              f'in {total_time:.2f}s (index {index_time:.2f}s)\n\n'
+    message += '\n'.join(lines)
+    if not_found:
+        message += '\n\nNo bodies found for: ' + ', '.join(not_found)
+    if conflicts:
+        message += '\n\nLeft unchanged, already holding a different search: ' + ', '.join(conflicts)
+    ui.messageBox(message)
+
+
+def update_selection_set(design, plural_name, matching_bodies, query=None):
+    """
+    Create the selection set called plural_name, or bring an existing one up
+    to date with matching_bodies, and record the query that fills it.
+    matching_bodies may hold any kind of entity.
+    
+    Returns a tuple of (action, added, removed, unchanged) where action is
+    "created", "updated" or "conflict". A set that already records a
+    different query is a conflict and is left unchanged, so one search never
+    silently takes over the set of another.
+    """
+    selection_sets = design.selectionSets
+    
+    # Check if selection set already exists
+    selection_set = None
+    with tracing.span('SelectionSets.item'):
+        for ss in selection_sets:
+            if ss.name == plural_name:
+                selection_set = ss
+                break
+    
+    if not selection_set:
+        with tracing.span('SelectionSets.add'):
+            selection_set = selection_sets.add(matching_bodies, plural_name)
+        if query:
+            record_query(selection_set, query)
+        return "created", len(matching_bodies), 0, 0
+    
+    if query:
+        recorded_query = read_query(selection_set)
+        if recorded_query and not same_query(recorded_query, query):
+            return "conflict", 0, 0, 0
+    
+    added_count, removed_count, unchanged_count = diff_selection_set(selection_set, matching_bodies)
+    if query:
+        record_query(selection_set, query)
+    return "updated", added_count, removed_count, unchanged_count
+
+
+def diff_selection_set(selection_set, matching_bodies):
+    """
+    Bring an existing selection set up to date with matching_bodies.
+    
+    The old and new members are compared by entity token and the set is only
+    rewritten when they actually differ, so it keeps its identity and an
+    unchanged set costs no edit at all.
+    
+    Returns a tuple of (added, removed, unchanged).
+    """
+    new_by_token = {}
+    for body in matching_bodies:
+        new_by_token.setdefault(body.entityToken, body)
+    
+    kept_entities = []
+    removed_count = 0
+    old_tokens = set()
+    with tracing.span('SelectionSet.entities'):
+        old_entities = selection_set.entities
+    for entity in old_entities:
+        token = entity.entityToken
+        old_tokens.add(token)
+        if token in new_by_token:
+            kept_entities.append(entity)
+        else:
+            removed_count += 1
+    
+    added_entities = [body for token, body in new_by_token.items() if token not in old_tokens]
+    
+    # Only touch the set when something changed
+    if added_entities or removed_count:
+        with tracing.span('SelectionSet.entities='):
+            selection_set.entities = kept_entities + added_entities
+    
+    return len(added_entities), removed_count, len(kept_entities)
+
+
+def search_query(pattern, entity_types=(entity_index.BODY,), scope_paths=None):
+    """
+    Return the query for a name search, in the form recorded on its selection set.
+    """
+    query = {'text': pattern.text, 'mode': pattern.mode,
+             'ignore_case': pattern.ignore_case, 'types': list(entity_types)}
+    if scope_paths:
+        query['scope'] = list(scope_paths)
+    return query
+
+
+def tag_query(tag):
+    """
+    Return the query for the bodies tagged with tag.
+    """
+    return {'tag': tag}
+
+
+def query_pattern(query):
+    """
+    Return the NamePattern of a name search query.
+    """
+    return name_matching.NamePattern(query['text'], query['mode'], query['ignore_case'])
+
+
+def query_types(query):
+    """
+    Return the entity types a query finds. Tags are only put on bodies, and
+    searches recorded before other entity types could be searched are body
+    searches.
+    """
+    return tuple(query.get('types', [entity_index.BODY]))
+
+
+def run_query(design, index, query):
+    """
+    Return the entities a query finds, as proxies in the root assembly
+    context. Tag lookups use Fusion's attribute query and need no index.
+    """
+    if 'tag' in query:
+        return tagging.find_tagged(design, query['tag'])
+    return index.find(query_pattern(query), query_types(query), query.get('scope'))
+
+
+def describe_query(query):
+    """
+    Return a short description of a query for messages.
+    """
+    if 'tag' in query:
+        return f'tagged "{query["tag"]}"'
+    return query_pattern(query).describe() + describe_scope(query.get('scope'))
+
+
+def query_set_name(query):
+    """
+    Return the selection set name for a query.
+    """
+    if 'tag' in query:
+        return f'{query["tag"]} (tag)'
+    return selection_set_name(query_pattern(query), query_types(query), query.get('scope'))
+
+
+def record_query(selection_set, query):
+    """
+    Store the query that fills a selection set as an attribute on it, so
+    Sync All Selection Sets can repeat it later.
+    """
+    value = json.dumps(query)
+    attribute = selection_set.attributes.itemByName(QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME)
+    if not attribute or attribute.value != value:
+        selection_set.attributes.add(QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME, value)
+
+
+def read_query(selection_set):
+    """
+    Return the query recorded on a selection set, or None if it was not
+    created by this add-in. Searches with no scope paths cover the whole design.
+    """
+    attribute = selection_set.attributes.itemByName(QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME)
+    if not attribute:
+        return None
+    return json.loads(attribute.value)
+
+
+def same_query(first, second):
+    """
+    Return True if two queries find the same entities, treating a search
+    recorded before entity types were recorded as a body search.
+    """
+    def normal(query):
+        if 'tag' in query:
+            return query
+        return dict(query, types=list(query_types(query)), scope=query.get('scope') or [])
+    return normal(first) == normal(second)
+
+
+def sync_selection_sets(ui, design, index, start_time):
+    """
+    Refresh every selection set made by this add-in from the entity index and
+    report what changed.
+    
+    Sets made before searches were recorded on them are recognised by a name
+    that is the plural of a body name in the design.
+    """
+    plural_names = None
+    lines = []
+    skipped = []
+    for selection_set in list(design.selectionSets):
+        query = read_query(selection_set)
+        if not query:
+            if plural_names is None:
+                plural_names = {make_plural(name): name for name in index.names[entity_index.BODY]}
+            body_name = plural_names.get(selection_set.name)
+            if body_name is None:
+                continue
+            query = search_query(name_matching.NamePattern(body_name))
+        
+        set_name = selection_set.name
+        matching_entities = run_query(design, index, query)
+        if not matching_entities:
+            skipped.append(set_name)
+            continue
+        
+        added_count, removed_count, unchanged_count = diff_selection_set(selection_set, matching_entities)
+        record_query(selection_set, query)
+        lines.append(f'{set_name}: {len(matching_entities)} (+{added_count} -{removed_count} ={unchanged_count})')
+    
+    total_time = time.perf_counter() - start_time
+    
+    if not lines and not skipped:
+        ui.messageBox('No selection sets made by Find Bodies were found.')
+        return
+    
+    message = f'Synced {len(lines)} selection {"set" if len(lines) == 1 else "sets"} in {total_time:.2f}s\n\n'
+    message += '\n'.join(lines)
+    if skipped:
+        message += '\n\nNo matches, left unchanged: ' + ', '.join(skipped)
+    ui.messageBox(message)
+
+
+def restore_selection_sets(ui, design, snapshot, entities_by_token, by_name_count, start_time):
+    """
+    Create or update each selection set in a snapshot from the entities
+    found for its members' tokens, and report what was restored.
+    """
+    # Look the existing sets up by name once rather than once per saved set
+    with tracing.span('SelectionSets.item'):
+        existing = {selection_set.name: selection_set for selection_set in design.selectionSets}
+    
+    lines = []
+    skipped = []
+    lost_count = 0
+    for saved_set in snapshot['sets']:
+        set_name = saved_set['name']
+        entities = []
+        for member in saved_set['members']:
+            entity = entities_by_token.get(member[set_snapshot.TOKEN])
+            if entity is None:
+                lost_count += 1
+            else:
+                entities.append(entity)
+        if not entities:
+            skipped.append(set_name)
+            continue
+        
+        selection_set = existing.get(set_name)
+        if selection_set is None:
+            with tracing.span('SelectionSets.add'):
+                selection_set = design.selectionSets.add(entities, set_name)
+            existing[set_name] = selection_set
+            lines.append(f'{set_name}: {len(entities)} (created)')
+        else:
+            added_count, removed_count, unchanged_count = diff_selection_set(selection_set, entities)
+            lines.append(f'{set_name}: {len(entities)} (updated, +{added_count} -{removed_count} ={unchanged_count})')
+        
+        if saved_set['query']:
+            attribute = selection_set.attributes.itemByName(QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME)
+            if not attribute or attribute.value != saved_set['query']:
+                selection_set.attributes.add(QUERY_ATTRIBUTE_GROUP, QUERY_ATTRIBUTE_NAME, saved_set['query'])
+    
+    total_time = time.perf_counter() - start_time
+    
+    message = f'Restored {len(lines)} selection {"set" if len(lines) == 1 else "sets"} in {total_time:.2f}s'
+    if by_name_count:
+        message += f' ({by_name_count} {"member" if by_name_count == 1 else "members"} found again by name)'
+    message += '\n\n' + '\n'.join(lines)
+    if lost_count:
+        message += f'\n\n{lost_count} {"member" if lost_count == 1 else "members"} could not be found'
+    if skipped:
+        message += '\n\nNothing found, not restored: ' + ', '.join(skipped)
+    ui.messageBox(message)
+
+
+def selection_set_name(pattern, entity_types=(entity_index.BODY,), scope_paths=None):
+    """
+    Return the selection set name for a search: the plural of the name for
+    a case-sensitive exact search, e.g. "Bolt M6s", otherwise the text searched
+    for followed by how it was matched, e.g. "Bolt* (glob)" or
+    "bolt m6 (exact, any case)", so different searches never share a set.
+    Searches for anything other than bodies alone are tagged with the kinds
+    of entity searched for, e.g. "Bolt M6s (Bodies, Sketches)", and scoped
+    searches with the occurrences searched, e.g. "Bolt M6s in Gearbox:1".
+    """
+    if pattern.mode == name_matching.EXACT and not pattern.ignore_case:
+        name = make_plural(pattern.text)
+    else:
+        qualifiers = [pattern.mode]
+        if pattern.ignore_case:
+            qualifiers.append('any case')
+        name = f'{pattern.text} ({", ".join(qualifiers)})'
+    
+    if tuple(entity_types) != (entity_index.BODY,):
+        labels = [label for label, entity_type in ENTITY_TYPE_LABELS.items() if entity_type in entity_types]
+        name += f' ({", ".join(labels)})'
+    return name + describe_scope(scope_paths)
+
+
+def describe_scope(scope_paths):
+    """
+    Return " in " and the names of the scope occurrences, or "" for a search
+    of the whole design.
+    """
+    if not scope_paths:
+        return ''
+    return ' in ' + ', '.join(entity_index.occurrence_name(path) for path in scope_paths)
+
+
+def entity_noun(entity_types, count):
+    """
+    Return the noun for count entities of entity_types, e.g. "body",
+    "sketches", or "entities" for a mix of types.
+    """
+    singular, plural = ENTITY_NOUNS[entity_types[0]] if len(entity_types) == 1 else ('entity', 'entities')
+    return singular if count == 1 else plural
+
+
+def parse_name_list(text):
+    """
+    Split a comma, semicolon or newline separated list of body names,
+    dropping blanks and duplicates while keeping the original order.
+    """
+    names = []
+    for part in text.replace(';', ',').replace('\n', ',').split(','):
+        name = part.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def read_name_file(path):
+    """
+    Read body names from a text or CSV file. Every non-empty cell is a name
+    and lines starting with # are ignored.
+    """
+    names = []
+    with open(path, newline='', encoding='utf-8-sig') as name_file:
+        for row in csv.reader(name_file):
+            if row and row[0].lstrip().startswith('#'):
+                continue
+            for cell in row:
+                name = cell.strip()
+                if name and name not in names:
+                    names.append(name)
+    return names
+
+
 def make_plural(word):
     """
     Convert a singular word to its plural form using common English rules.
@@ -0,0 +1,158 @@
+"""
+Assembly snapshots: the occurrence tree and entity names of a design written
+to a file, so designs can be searched without opening them in Fusion.
+
+The add-in writes a snapshot from its entity index and
+Tools/query_snapshots.py searches many of them at once. This module has no
+Fusion dependency so the query tool can use it outside Fusion.
+
+A snapshot is gzip-compressed JSON laid out in columns: each table is a set
+of equal-length lists, with components and entity types stored once and
+referred to by position. Repeated values sit next to each other, which keeps
+the files small, and loading one is a single json.load with no per-row
+objects to build.
+"""
+
+import gzip
+import json
+
+from . import name_matching
+
+# Version of the file layout; files in another layout are refused
+FORMAT_VERSION = 1
+
+FILE_EXTENSION = '.asmsnap'
+FILE_FILTER = 'Assembly snapshots (*.asmsnap);;All files (*.*)'
+
+# Entity types as in entity_index, repeated here as that module needs Fusion
+BODY = 'body'
+SKETCH = 'sketch'
+CONSTRUCTION_PLANE = 'constructionPlane'
+JOINT = 'joint'
+# Searched by occurrence name
+OCCURRENCE = 'occurrence'
+
+ENTITY_TYPES = (BODY, SKETCH, CONSTRUCTION_PLANE, JOINT, OCCURRENCE)
+
+
+def write(path, document_info, component_entities, component_occurrences):
+    """
+    Write a snapshot of an indexed design.
+
+    Args:
+        path (str): The file to write
+        document_info (dict): Details of the design's document, e.g. its name
+        component_entities (dict): component id -> {entity type -> list of
+            [name, entity token, ...]}, as in EntityIndex.component_entities
+        component_occurrences (dict): component id -> list of [occurrence
+            path, occurrence token, ...], with '' as the root component's path
+    """
+    component_ids = list(component_occurrences)
+    component_positions = {comp_id: i for i, comp_id in enumerate(component_ids)}
+    entity_types = []
+    type_positions = {}
+
+    occurrences = {'path': [], 'token': [], 'component': []}
+    for comp_id, entries in component_occurrences.items():
+        for entry in entries:
+            occurrences['path'].append(entry[0])
+            occurrences['token'].append(entry[1])
+            occurrences['component'].append(component_positions[comp_id])
+
+    entities = {'type': [], 'name': [], 'token': [], 'component': []}
+    for comp_id, entries_by_type in component_entities.items():
+        for entity_type, entries in entries_by_type.items():
+            if entity_type not in type_positions:
+                type_positions[entity_type] = len(entity_types)
+                entity_types.append(entity_type)
+            for entry in entries:
+                entities['type'].append(type_positions[entity_type])
+                entities['name'].append(entry[0])
+                entities['token'].append(entry[1])
+                entities['component'].append(component_positions[comp_id])
+
+    snapshot = {
+        'format': FORMAT_VERSION,
+        'document': document_info,
+        'components': component_ids,
+        'types': entity_types,
+        'occurrences': occurrences,
+        'entities': entities,
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as snapshot_file:
+        json.dump(snapshot, snapshot_file, separators=(',', ':'))
+
+
+def read(path):
+    """
+    Read a snapshot written by write().
+
+    Raises:
+        ValueError: If the file is not a snapshot in this format
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as snapshot_file:
+            data = json.load(snapshot_file)
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        raise ValueError(f'"{path}" is not an assembly snapshot: {e}')
+    if not isinstance(data, dict) or data.get('format') != FORMAT_VERSION:
+        raise ValueError(f'"{path}" is not an assembly snapshot this version can read.')
+    return AssemblySnapshot(data)
+
+
+class AssemblySnapshot:
+    """
+    A loaded snapshot, searchable with the same name patterns as the add-in.
+    """
+    def __init__(self, data):
+        self.document = data['document']
+        self.types = data['types']
+        self.occurrences = data['occurrences']
+        self.entities = data['entities']
+        # entity type -> {name -> list of entity rows}, built on first search
+        self._names = None
+        # component position -> list of occurrence rows
+        self._component_occurrences = None
+        self._sorted_names = {}
+
+    def _build(self):
+        names = {entity_type: {} for entity_type in self.types}
+        types = self.types
+        for row, (type_position, name) in enumerate(zip(self.entities['type'], self.entities['name'])):
+            names[types[type_position]].setdefault(name, []).append(row)
+
+        names[OCCURRENCE] = {}
+        component_occurrences = {}
+        for row, (path, component) in enumerate(zip(self.occurrences['path'], self.occurrences['component'])):
+            component_occurrences.setdefault(component, []).append(row)
+            if path:
+                names[OCCURRENCE].setdefault(path.rpartition('+')[2], []).append(row)
+
+        self._names = names
+        self._component_occurrences = component_occurrences
+
+    def find(self, pattern, entity_types=(BODY,)):
+        """
+        Return (entity type, name, occurrence path) for every place an entity
+        of entity_types whose name matches a name_matching.NamePattern
+        appears. Entities of the root component have the path ''.
+        """
+        if self._names is None:
+            self._build()
+
+        matches = []
+        for entity_type in entity_types:
+            type_names = self._names.get(entity_type, {})
+            sorted_names = self._sorted_names.get(entity_type)
+            if sorted_names is None:
+                sorted_names = name_matching.SortedNames(type_names)
+                self._sorted_names[entity_type] = sorted_names
+
+            for name in pattern.select(sorted_names):
+                for row in type_names[name]:
+                    if entity_type == OCCURRENCE:
+                        matches.append((entity_type, name, self.occurrences['path'][row]))
+                        continue
+                    for occ_row in self._component_occurrences.get(self.entities['component'][row], []):
+                        matches.append((entity_type, name, self.occurrences['path'][occ_row]))
+        return matches
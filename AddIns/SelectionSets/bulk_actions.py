@@ -0,0 +1,279 @@
+"""
+Bulk changes to the members of a selection set: show, hide, light bulbs and
+appearance.
+
+A body's light bulb and appearance belong to the body in its component, so
+changing them through one member changes every instance of that component,
+including instances that are not in the set. plan() works out the writes an
+action needs, once per native entity however many of its proxies the set
+holds, and counts the instances each write reaches so the caller can warn
+before changing more than the set. A property that already has the wanted
+value is not written at all, since every write can cost a recompute and a
+redraw. Occurrences are changed as they are, one instance each.
+
+Show and Hide go by each member's own visibility, which also depends on the
+light bulbs of the occurrences above it: Hide switches off the light bulb of
+a member that is visible, and Show switches on the light bulbs of a hidden
+member and of every switched off occurrence above it. Light Bulb On and Off
+only set the members' own light bulbs.
+
+Nothing here refreshes the viewport; the caller refreshes it once after the
+whole batch.
+"""
+
+from . import entity_index
+from . import tracing
+
+SHOW = 'show'
+HIDE = 'hide'
+LIGHT_BULB_ON = 'lightBulbOn'
+LIGHT_BULB_OFF = 'lightBulbOff'
+APPEARANCE = 'appearance'
+
+ACTIONS = (SHOW, HIDE, LIGHT_BULB_ON, LIGHT_BULB_OFF, APPEARANCE)
+
+# Entity types that have an appearance
+APPEARANCE_TYPES = (entity_index.BODY, entity_index.OCCURRENCE)
+
+
+class Target:
+    """
+    A native entity, or an occurrence, with the set members that refer to it.
+
+    Args:
+        entity_type (str): The entity type, as in entity_index.ENTITY_TYPES
+        entity: The native entity or occurrence whose properties are written
+    """
+    def __init__(self, entity_type, entity):
+        self.entity_type = entity_type
+        self.entity = entity
+        self.members = []
+        # Occurrence paths of the members, '' for a native member
+        self.member_paths = set()
+
+
+class BulkChange:
+    """
+    The writes an action needs to bring the members of a selection set to
+    the wanted state, worked out by plan() and made by apply().
+
+    Attributes:
+        writes (list): [entity, property name, value] for each write
+        instance_count (int): Instances in the design the writes reach
+        outside_count (int): Instances the writes reach that are not members
+        changed_count (int): Members the writes change
+        unchanged_count (int): Members already in the wanted state
+        unsupported_count (int): Members the action does not apply to
+        parent_count (int): Occurrences above hidden members that Show
+            switches on
+        group_count (int): Components (or assemblies, for occurrences) the
+            members belong to
+    """
+    def __init__(self):
+        self.writes = []
+        self.instance_count = 0
+        self.outside_count = 0
+        self.changed_count = 0
+        self.unchanged_count = 0
+        self.unsupported_count = 0
+        self.parent_count = 0
+        self.group_count = 0
+
+
+def group_members(entities):
+    """
+    Group selection set members by the component owning their native entity,
+    keeping each native entity once.
+
+    Returns:
+        tuple: ({group key -> {entity key -> Target}}, count of members that
+        are not an entity type the index holds), where the group key is a
+        component id, or an occurrence's parent path for occurrences
+    """
+    groups = {}
+    targets = {}
+    unknown_count = 0
+    for entity in entities:
+        entity_type = entity_index.entity_type_of(entity)
+        if entity_type is None:
+            unknown_count += 1
+            continue
+
+        if entity_type == entity_index.OCCURRENCE:
+            with tracing.span('Occurrence.fullPathName'):
+                key = entity.fullPathName
+            target = targets.get(key)
+            if target is None:
+                target = Target(entity_type, entity)
+                targets[key] = target
+                groups.setdefault(key.rpartition('+')[0], {})[key] = target
+            target.members.append(entity)
+            target.member_paths.add(key)
+            continue
+
+        with tracing.span('Entity.nativeObject'):
+            native = entity.nativeObject or entity
+        with tracing.span('Entity.entityToken'):
+            key = native.entityToken
+        target = targets.get(key)
+        if target is None:
+            target = Target(entity_type, native)
+            targets[key] = target
+            with tracing.span('Entity.parentComponent'):
+                group_key = native.parentComponent.id
+            groups.setdefault(group_key, {})[key] = target
+        with tracing.span('Entity.assemblyContext'):
+            context = entity.assemblyContext
+        target.members.append(entity)
+        target.member_paths.add(context.fullPathName if context else '')
+    return groups, unknown_count
+
+
+def plan(entities, action, appearance=None):
+    """
+    Work out the writes that bring the members of a selection set to the
+    state an action wants, without changing anything.
+
+    Args:
+        entities (list): The set's entities, proxies or native
+        action (str): One of ACTIONS
+        appearance (adsk.core.Appearance, optional): The appearance for APPEARANCE
+    Returns:
+        BulkChange: The writes and the counts to report
+    """
+    if action not in ACTIONS:
+        raise ValueError(f'Unknown action "{action}"')
+
+    change = BulkChange()
+    groups, change.unsupported_count = group_members(entities)
+    change.group_count = len(groups)
+    # Occurrence path -> occurrence switched on by Show
+    shown_occurrences = {}
+    for group in groups.values():
+        for target in group.values():
+            if action == APPEARANCE and target.entity_type not in APPEARANCE_TYPES:
+                change.unsupported_count += len(target.members)
+                continue
+
+            if action == SHOW:
+                changed = _plan_show(change, target, shown_occurrences)
+            elif action == HIDE:
+                changed = _plan_hide(change, target)
+            elif action == APPEARANCE:
+                changed = _plan_write(change, target, 'appearance', appearance)
+            else:
+                changed = _plan_write(change, target, 'isLightBulbOn', action == LIGHT_BULB_ON)
+
+            change.changed_count += changed
+            change.unchanged_count += len(target.members) - changed
+    return change
+
+
+def apply(change):
+    """
+    Make the writes of a BulkChange from plan().
+    """
+    for entity, property_name, value in change.writes:
+        with tracing.span('Entity.' + property_name + '='):
+            setattr(entity, property_name, value)
+
+
+def _plan_write(change, target, property_name, value):
+    """
+    Add a write of a target's own property unless it already has the value.
+    Returns the number of members changed.
+    """
+    with tracing.span('Entity.' + property_name):
+        current = getattr(target.entity, property_name)
+    if _same(current, value):
+        return 0
+    _add_write(change, target, property_name, value)
+    return len(target.members)
+
+
+def _plan_hide(change, target):
+    """
+    Switch off a target's light bulb if any of its members is visible.
+    """
+    visible_count = 0
+    for member in target.members:
+        with tracing.span('Entity.isVisible'):
+            if member.isVisible:
+                visible_count += 1
+    if visible_count:
+        _add_write(change, target, 'isLightBulbOn', False)
+    return visible_count
+
+
+def _plan_show(change, target, shown_occurrences):
+    """
+    Switch on the light bulbs of a target and of the occurrences above its
+    hidden members. Occurrences are switched on once however many members
+    sit below them.
+    """
+    hidden = []
+    for member in target.members:
+        with tracing.span('Entity.isVisible'):
+            if not member.isVisible:
+                hidden.append(member)
+    if not hidden:
+        return 0
+
+    with tracing.span('Entity.isLightBulbOn'):
+        if not target.entity.isLightBulbOn:
+            _add_write(change, target, 'isLightBulbOn', True)
+
+    for member in hidden:
+        with tracing.span('Entity.assemblyContext'):
+            occ = member.assemblyContext
+        while occ is not None:
+            with tracing.span('Occurrence.fullPathName'):
+                path = occ.fullPathName
+            if path in shown_occurrences:
+                break
+            with tracing.span('Occurrence.isLightBulbOn'):
+                if not occ.isLightBulbOn:
+                    change.writes.append([occ, 'isLightBulbOn', True])
+                    change.parent_count += 1
+            shown_occurrences[path] = occ
+            with tracing.span('Occurrence.assemblyContext'):
+                occ = occ.assemblyContext
+    return len(hidden)
+
+
+def _add_write(change, target, property_name, value):
+    """
+    Add a write of a target's own property and count the instances it
+    reaches, including those outside the set.
+    """
+    change.writes.append([target.entity, property_name, value])
+    instance_count = _instances(target)
+    change.instance_count += instance_count
+    change.outside_count += max(0, instance_count - len(target.member_paths))
+
+
+def _instances(target):
+    """
+    Return the number of places a target appears in the design: one for an
+    occurrence or an entity of the root component, otherwise the number of
+    occurrences of the entity's component.
+    """
+    if target.entity_type == entity_index.OCCURRENCE:
+        return 1
+    with tracing.span('Entity.parentComponent'):
+        component = target.entity.parentComponent
+    root_comp = component.parentDesign.rootComponent
+    if component.id == root_comp.id:
+        return 1
+    with tracing.span('Component.allOccurrencesByComponent'):
+        return root_comp.allOccurrencesByComponent(component).count
+
+
+def _same(current, value):
+    """
+    Return True if a property already has the wanted value. Appearances are
+    compared by id as each read returns a new object.
+    """
+    if isinstance(value, bool):
+        return current == value
+    return current is not None and value is not None and current.id == value.id
@@ -0,0 +1,501 @@
+"""
+Design-scoped index of the names of bodies, occurrences, sketches,
+construction planes and joints, used by the Find Bodies command.
+
+Walking root_comp.allOccurrences is the expensive part of a search, so the
+walk is done once per design and the result kept until the design changes.
+Each component is visited once and all of its entity collections are read in
+that visit, so any mix of entity types can be searched without another walk.
+"""
+
+import adsk.core
+import adsk.fusion
+
+from . import index_cache
+from . import name_matching
+from . import tracing
+
+# One index per open document, keyed by the document's creation id
+_indexes = {}
+
+# Occurrence entry standing for the root component itself
+ROOT_OCCURRENCE = ['', None, None]
+
+# Entity types held by components, with the Component collection each is read from
+BODY = 'body'
+SKETCH = 'sketch'
+CONSTRUCTION_PLANE = 'constructionPlane'
+JOINT = 'joint'
+COMPONENT_ENTITY_TYPES = {
+    BODY: 'bRepBodies',
+    SKETCH: 'sketches',
+    CONSTRUCTION_PLANE: 'constructionPlanes',
+    JOINT: 'joints',
+}
+
+# Occurrences are searched by their own name, e.g. "Bolt:3"
+OCCURRENCE = 'occurrence'
+
+ENTITY_TYPES = tuple(COMPONENT_ENTITY_TYPES) + (OCCURRENCE,)
+
+# API class name (the last part of objectType) of each entity type
+OBJECT_TYPES = {
+    'BRepBody': BODY,
+    'Sketch': SKETCH,
+    'ConstructionPlane': CONSTRUCTION_PLANE,
+    'Joint': JOINT,
+    'Occurrence': OCCURRENCE,
+}
+
+
+class EntityIndex:
+    """
+    Maps each entity name in a design to every place that entity appears.
+
+    Entities are recorded once per component and occurrences are grouped by
+    the component they reference, so a fastener used in hundreds of places
+    only has its bodies and sketches read once. Root component entities are
+    recorded against the root component with no occurrence.
+
+    Every entry is a [name or path, entity token, object] list. Entries loaded
+    from the on-disk cache start without an object, which is looked up from
+    its token the first time a search needs it.
+
+    An index with a scope covers only the subtrees of the given occurrences.
+    Its walk follows childOccurrences down from them, so it costs in
+    proportion to those subtrees rather than the whole design. Scoped indexes
+    are never cached on disk.
+
+    Args:
+        design (adsk.fusion.Design): The design to index
+        scope (list, optional): Occurrences in the root assembly context
+            whose subtrees to index instead of the whole design
+    """
+    def __init__(self, design, scope=None):
+        self.design = design
+        self.scope = scope
+        # component id -> {entity type -> list of [name, entity token, native entity]}
+        self.component_entities = {}
+        # component id -> list of [occurrence path, occurrence token, occurrence]
+        self.component_occurrences = {}
+        # entity type -> {name -> list of component ids holding an entity with that name}
+        # For occurrences the component is the one the occurrence references
+        self.names = {entity_type: {} for entity_type in ENTITY_TYPES}
+        self._sorted_names = {}
+        self.is_stale = True
+        # Incremented by invalidate(), so a walk can tell the design changed
+        # while it was running
+        self.generation = 0
+        # timeline_state() when the index, or the walk in progress, was started
+        self.timeline_state = None
+
+    def rebuild(self):
+        """
+        Walk the assembly, or the scope's subtrees, and rebuild the name lookup.
+        """
+        for _ in self.iter_rebuild():
+            pass
+
+    def iter_rebuild(self):
+        """
+        Rebuild the name lookup as a generator that yields (done, total)
+        after each occurrence, so the walk can be spread over several slices
+        of UI time. The index is only replaced once the walk completes, so an
+        abandoned walk leaves it untouched.
+
+        The progress dialog does not block the model, so the design can be
+        edited between slices. If the index is invalidated while the walk
+        runs, the walk starts again rather than installing a stale result.
+        """
+        while True:
+            generation = self.generation
+            self.timeline_state = timeline_state(self.design)
+            component_entities = {}
+            component_occurrences = {}
+            if self.scope is None:
+                root_comp = self.design.rootComponent
+                component_entities[root_comp.id] = _read_entities(root_comp)
+                component_occurrences[root_comp.id] = [ROOT_OCCURRENCE]
+                walk = self._walk_design(root_comp)
+            else:
+                walk = self._walk_scope()
+
+            for occ, done, total in walk:
+                with tracing.span('Occurrence.component'):
+                    comp = occ.component
+                if comp:
+                    comp_id = comp.id
+                    if comp_id not in component_entities:
+                        component_entities[comp_id] = _read_entities(comp)
+                        component_occurrences[comp_id] = []
+                    with tracing.span('Occurrence.fullPathName'):
+                        occ_path = occ.fullPathName
+                    with tracing.span('Occurrence.entityToken'):
+                        occ_token = occ.entityToken
+                    component_occurrences[comp_id].append([occ_path, occ_token, occ])
+                yield done, total
+
+            if self.generation == generation:
+                break
+
+        self._replace(component_entities, component_occurrences)
+        self.save_to_cache()
+
+    def _walk_design(self, root_comp):
+        """
+        Yield (occurrence, done, total) for every occurrence in the design.
+        """
+        with tracing.span('Component.allOccurrences'):
+            all_occurrences = root_comp.allOccurrences
+            total = all_occurrences.count
+        for done, occ in enumerate(tracing.traced_iter(all_occurrences, 'OccurrenceList.item'), 1):
+            yield occ, done, total
+
+    def _walk_scope(self):
+        """
+        Yield (occurrence, done, total) for the scope occurrences and every
+        occurrence below them, depth first. The total is an estimate that
+        grows as the walk finds more children.
+        """
+        scope_paths = [occ.fullPathName for occ in self.scope]
+        # A selected occurrence inside another selected one is walked as
+        # part of the outer one
+        stack = [occ for occ, path in zip(self.scope, scope_paths)
+                 if not in_scope(path, [p for p in scope_paths if p != path])]
+        stack.reverse()
+        done = 0
+        while stack:
+            occ = stack.pop()
+            with tracing.span('Occurrence.childOccurrences'):
+                children = list(occ.childOccurrences)
+            stack.extend(reversed(children))
+            done += 1
+            yield occ, done, done + len(stack)
+
+    def _replace(self, component_entities, component_occurrences):
+        """
+        Install new component tables and rebuild the name lookup from them.
+        """
+        names = {entity_type: {} for entity_type in ENTITY_TYPES}
+        for comp_id, entities in component_entities.items():
+            for entity_type, entries in entities.items():
+                _add_names(names[entity_type], comp_id, (name for name, _, _ in entries))
+        for comp_id, occurrences in component_occurrences.items():
+            _add_names(names[OCCURRENCE], comp_id,
+                       (occurrence_name(path) for path, _, _ in occurrences if path))
+
+        self.component_entities = component_entities
+        self.component_occurrences = component_occurrences
+        self.names = names
+        self._sorted_names = {}
+        self.is_stale = False
+
+    def load_from_cache(self):
+        """
+        Replace a stale index with the cached one for this document version.
+
+        Returns:
+            bool: True if a cached index was found
+        """
+        if self.scope is not None:
+            return False
+        key = index_cache.cache_key(self.design.parentDocument)
+        if key is None:
+            return False
+        cached = index_cache.load(key)
+        if cached is None:
+            return False
+
+        component_entities, component_occurrences = cached
+        self.timeline_state = timeline_state(self.design)
+        self._replace(
+            {comp_id: {entity_type: [[name, token, None] for name, token in entries]
+                       for entity_type, entries in entities.items()}
+             for comp_id, entities in component_entities.items()},
+            {comp_id: [ROOT_OCCURRENCE if token is None else [path, token, None]
+                       for path, token in occurrences]
+             for comp_id, occurrences in component_occurrences.items()})
+        return True
+
+    def save_to_cache(self):
+        """
+        Write the index to the on-disk cache if it covers the whole design and
+        the document is saved and unchanged. Only called straight after a
+        completed walk: an index kept in memory may have missed edits made
+        without a command, and must not be stored as a saved version.
+        """
+        if self.is_stale or self.scope is not None:
+            return
+        key = index_cache.cache_key(self.design.parentDocument)
+        if key is None:
+            return
+        try:
+            index_cache.save(
+                key,
+                {comp_id: {entity_type: [[name, token] for name, token, _ in entries]
+                           for entity_type, entries in entities.items()}
+                 for comp_id, entities in self.component_entities.items()},
+                {comp_id: [[path, token] for path, token, _ in occurrences]
+                 for comp_id, occurrences in self.component_occurrences.items()})
+        except Exception as e:
+            # The cache only saves time, a failure to write it is not an error
+            print('Failed to save entity index cache:', e)
+
+    def invalidate(self):
+        """
+        Mark the index as out of date so the next lookup rebuilds it, and
+        any walk in progress starts again.
+        """
+        self.is_stale = True
+        self.generation += 1
+        self.timeline_state = None
+
+    def timeline_changed(self):
+        """
+        Return True if the timeline has had features added or removed or its
+        marker moved since the index, or the walk in progress, was started.
+        This catches a rollback, which runs no command; other edits are seen
+        through the commands that make them.
+        """
+        return self.timeline_state is not None and timeline_state(self.design) != self.timeline_state
+
+    def sorted_names(self, entity_type=BODY):
+        """
+        Return the unique names of one entity type as a SortedNames index,
+        built on first use.
+        """
+        sorted_names = self._sorted_names.get(entity_type)
+        if sorted_names is None:
+            sorted_names = name_matching.SortedNames(self.names[entity_type])
+            self._sorted_names[entity_type] = sorted_names
+        return sorted_names
+
+    def _matches(self, entity_type, names, scope_paths=None):
+        """
+        Return the (occurrence entry, entity entry) pairs for entities of one
+        type with any of names. Matched occurrences are paired with
+        ROOT_OCCURRENCE as they are already in the root assembly context.
+        With scope_paths, only matches in or below those occurrence paths
+        are returned.
+        """
+        wanted = set(names)
+        type_names = self.names[entity_type]
+        comp_ids = []
+        seen = set()
+        for name in names:
+            for comp_id in type_names.get(name, []):
+                if comp_id not in seen:
+                    seen.add(comp_id)
+                    comp_ids.append(comp_id)
+
+        matches = []
+        for comp_id in comp_ids:
+            occ_entries = self.component_occurrences[comp_id]
+            if scope_paths is not None:
+                occ_entries = [occ_entry for occ_entry in occ_entries if in_scope(occ_entry[0], scope_paths)]
+            if entity_type == OCCURRENCE:
+                matches.extend((ROOT_OCCURRENCE, occ_entry) for occ_entry in occ_entries
+                               if occ_entry[0] and occurrence_name(occ_entry[0]) in wanted)
+                continue
+            entries = [entry for entry in self.component_entities[comp_id].get(entity_type, [])
+                       if entry[0] in wanted]
+            for occ_entry in occ_entries:
+                matches.extend((occ_entry, entry) for entry in entries)
+        return matches
+
+    def _entity(self, entry):
+        """
+        Return the live object for an index entry, looking it up by entity
+        token if it was loaded from the cache or has become invalid.
+        """
+        entity = entry[2]
+        if entity is None or not entity.isValid:
+            found = tracing.call('Design.findEntityByToken', self.design.findEntityByToken, entry[1])
+            entity = found[0] if found else None
+            entry[2] = entity
+        return entity
+
+    def _resolve_matches(self, matches):
+        """
+        Return (occurrence, native entity) for each match, or None if any of
+        them no longer exists.
+        """
+        resolved = []
+        for occ_entry, entity_entry in matches:
+            entity = self._entity(entity_entry)
+            occ = None if occ_entry is ROOT_OCCURRENCE else self._entity(occ_entry)
+            if entity is None or (occ is None and occ_entry is not ROOT_OCCURRENCE):
+                return None
+            resolved.append((occ, entity))
+        return resolved
+
+    def _resolve(self, select_names, entity_types, scope_paths):
+        """
+        Turn the names chosen by select_names(entity_type) for each of
+        entity_types into entities in the root assembly context, rebuilding
+        first if the index is out of date.
+        """
+        if self.is_stale:
+            self.rebuild()
+
+        def matches():
+            return [match for entity_type in entity_types
+                    for match in self._matches(entity_type, select_names(entity_type), scope_paths)]
+
+        # Only the matched entities are checked, so a stale entry costs one
+        # rebuild rather than a validity check on every entity in the design
+        resolved = self._resolve_matches(matches())
+        if resolved is None:
+            self.rebuild()
+            resolved = self._resolve_matches(matches()) or []
+
+        # Proxies are only created for the matches, never for the whole design
+        return [entity if occ is None else
+                tracing.call(type(entity).__name__ + '.createForAssemblyContext',
+                             entity.createForAssemblyContext, occ)
+                for occ, entity in resolved]
+
+    def find_native(self, pattern, entity_types=(BODY,)):
+        """
+        Return the native entities of entity_types whose names match a
+        name_matching.NamePattern, once each however many occurrences they
+        appear in.
+        """
+        if self.is_stale:
+            self.rebuild()
+
+        def entries():
+            unique = {}
+            for entity_type in entity_types:
+                names = pattern.select(self.sorted_names(entity_type))
+                for _, entry in self._matches(entity_type, names):
+                    unique[id(entry)] = entry
+            return list(unique.values())
+
+        entities = [self._entity(entry) for entry in entries()]
+        if any(entity is None for entity in entities):
+            self.rebuild()
+            entities = [entity for entity in (self._entity(entry) for entry in entries())
+                        if entity is not None]
+        return entities
+
+    def lookup(self, name, entity_types=(BODY,), scope_paths=None):
+        """
+        Return the entities of entity_types called name, as proxies in the
+        root assembly context, optionally only those within scope_paths.
+        """
+        return self._resolve(lambda entity_type: [name], entity_types, scope_paths)
+
+    def find(self, pattern, entity_types=(BODY,), scope_paths=None):
+        """
+        Return the entities of entity_types whose names match a
+        name_matching.NamePattern, as proxies in the root assembly context,
+        optionally only those within scope_paths.
+        """
+        return self._resolve(lambda entity_type: pattern.select(self.sorted_names(entity_type)),
+                             entity_types, scope_paths)
+
+
+def _read_entities(component):
+    """
+    Return {entity type: [name, token, native entity] for each entity} for
+    every entity collection of a component.
+    """
+    entities = {}
+    for entity_type, collection_name in COMPONENT_ENTITY_TYPES.items():
+        with tracing.span('Component.' + collection_name):
+            entities[entity_type] = [[entity.name, entity.entityToken, entity]
+                                     for entity in getattr(component, collection_name)]
+    return entities
+
+
+def _add_names(names, comp_id, entry_names):
+    """
+    Record comp_id against each of entry_names in a name -> component ids map.
+    """
+    for name in entry_names:
+        comp_ids = names.setdefault(name, [])
+        if not comp_ids or comp_ids[-1] != comp_id:
+            comp_ids.append(comp_id)
+
+
+def entity_type_of(entity):
+    """
+    Return the entity type of an API object, or None if it is not one the
+    index holds.
+    """
+    return OBJECT_TYPES.get(entity.objectType.rpartition('::')[2])
+
+
+def in_scope(path, scope_paths):
+    """
+    Return True if an occurrence path is one of scope_paths or below one of
+    them. The root component's '' path is only in a scope that lists ''.
+    """
+    return any(path == scope_path or path.startswith(scope_path + '+') for scope_path in scope_paths)
+
+
+def occurrence_name(path):
+    """
+    Return an occurrence's own name from its full path name, e.g.
+    "Group 1:1+Bolt:3" -> "Bolt:3".
+    """
+    return path.rpartition('+')[2]
+
+
+def timeline_state(design):
+    """
+    Return (timeline count, marker position) for a parametric design, or
+    None for a direct design, which has no timeline.
+    """
+    with tracing.span('Design.timeline'):
+        if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+            return None
+        timeline = design.timeline
+        return timeline.count, timeline.markerPosition
+
+
+def document_key(document):
+    """
+    Return the key used to store the index for a document.
+    """
+    return document.creationId
+
+
+def get_index(design):
+    """
+    Return the index for a design, creating an empty (stale) one if needed.
+    An existing index is marked stale if the timeline has changed since it
+    was built, which catches rollbacks that run no command.
+    """
+    key = document_key(design.parentDocument)
+    index = _indexes.get(key)
+    if index is None:
+        index = EntityIndex(design)
+        _indexes[key] = index
+    elif index.timeline_changed():
+        index.invalidate()
+    return index
+
+
+def invalidate(design):
+    """
+    Mark the index for a design as out of date, if one exists.
+    """
+    index = _indexes.get(document_key(design.parentDocument))
+    if index:
+        index.invalidate()
+
+
+def discard(document):
+    """
+    Drop the index for a document that is being closed.
+    """
+    _indexes.pop(document_key(document), None)
+
+
+def clear():
+    """
+    Drop every index, used when the add-in stops.
+    """
+    _indexes.clear()
@@ -0,0 +1,122 @@
+"""
+On-disk cache of entity indexes, so the first search after opening an
+unchanged design can skip the assembly walk.
+
+Each saved document version gets one row in a SQLite database in the add-in's
+data directory, holding the component entity names and the occurrence paths
+with their entity tokens as compressed JSON. Rows are keyed by the document's
+data file id and version number, and only the most recently used documents
+are kept.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+# Number of documents kept in the cache
+MAX_DOCUMENTS = 50
+
+# Version of the payload layout; rows written in another layout are ignored
+FORMAT_VERSION = 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS body_index (
+    document_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    payload BLOB NOT NULL
+)
+'''
+
+
+def data_dir():
+    """
+    Return the directory this add-in keeps its data in, creating it if needed.
+    """
+    base = os.environ.get('APPDATA') or \
+        os.path.join(os.path.expanduser('~'), 'Library', 'Application Support')
+    path = os.path.join(base, 'Embergleam', 'CreateSelectionSet')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path():
+    return os.path.join(data_dir(), 'body_index.sqlite')
+
+
+def cache_key(document):
+    """
+    Return the (document id, version) a document's index is cached under, or
+    None when the document has unsaved changes or has never been saved.
+    """
+    if document.isModified:
+        return None
+    data_file = document.dataFile
+    if not data_file:
+        return None
+    return data_file.id, data_file.versionNumber
+
+
+def _connect():
+    connection = sqlite3.connect(cache_path())
+    connection.execute(_SCHEMA)
+    return connection
+
+
+def load(key):
+    """
+    Return the cached (component entities, component occurrences) for key,
+    or None if there is no entry for that document version in this format.
+    """
+    document_id, version = key
+    connection = _connect()
+    try:
+        row = connection.execute(
+            'SELECT payload FROM body_index WHERE document_id = ? AND version = ?',
+            (document_id, version)).fetchone()
+        if row is None:
+            return None
+        with connection:
+            connection.execute('UPDATE body_index SET last_used = ? WHERE document_id = ?',
+                               (time.time(), document_id))
+    finally:
+        connection.close()
+
+    payload = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+    if payload.get('format') != FORMAT_VERSION:
+        return None
+    return payload['entities'], payload['occurrences']
+
+
+def save(key, component_entities, component_occurrences):
+    """
+    Store an index under key, replacing any older version of the document,
+    and drop the least recently used documents beyond MAX_DOCUMENTS.
+
+    Args:
+        key (tuple): (document id, version) from cache_key()
+        component_entities (dict): component id -> {entity type -> list of [name, entity token]}
+        component_occurrences (dict): component id -> list of [occurrence path, occurrence token]
+    """
+    document_id, version = key
+    payload = zlib.compress(json.dumps({
+        'format': FORMAT_VERSION,
+        'entities': component_entities,
+        'occurrences': component_occurrences,
+    }, separators=(',', ':')).encode('utf-8'))
+
+    connection = _connect()
+    try:
+        with connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO body_index (document_id, version, last_used, payload) '
+                'VALUES (?, ?, ?, ?)',
+                (document_id, version, time.time(), payload))
+            connection.execute(
+                'DELETE FROM body_index WHERE document_id NOT IN '
+                '(SELECT document_id FROM body_index ORDER BY last_used DESC LIMIT ?)',
+                (MAX_DOCUMENTS,))
+    finally:
+        connection.close()
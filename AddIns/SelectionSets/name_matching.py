@@ -0,0 +1,163 @@
+"""
+Body name matching for the Find Bodies commands.
+
+Patterns are compiled once and tested against the unique names held by a
+SortedNames index rather than against every body in the design. Prefix
+queries, and globs that start with literal text, only look at the slice of
+the sorted names that can match.
+
+This module does not use the Fusion API so it can also be used outside
+Fusion.
+"""
+
+import bisect
+import fnmatch
+import re
+
+# Supported match modes
+EXACT = 'exact'
+PREFIX = 'prefix'
+GLOB = 'glob'
+REGEX = 'regex'
+
+MATCH_MODES = (EXACT, PREFIX, GLOB, REGEX)
+
+_GLOB_SPECIAL = '*?['
+_REGEX_SPECIAL = '.^$*+?{}[]\\|()'
+
+
+class SortedNames:
+    """
+    Sorted view of a set of names supporting fast prefix range queries.
+    """
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.name_set = set(self.names)
+        self._folded = None
+
+    @property
+    def folded(self):
+        """
+        Sorted (case-folded name, name) pairs, built on first use.
+        """
+        if self._folded is None:
+            self._folded = sorted((name.casefold(), name) for name in self.names)
+        return self._folded
+
+    def with_prefix(self, prefix, ignore_case=False):
+        """
+        Return every name starting with prefix.
+        """
+        if ignore_case:
+            key = prefix.casefold()
+            folded = self.folded
+            i = bisect.bisect_left(folded, (key,))
+            matches = []
+            while i < len(folded) and folded[i][0].startswith(key):
+                matches.append(folded[i][1])
+                i += 1
+            return matches
+
+        names = self.names
+        i = bisect.bisect_left(names, prefix)
+        matches = []
+        while i < len(names) and names[i].startswith(prefix):
+            matches.append(names[i])
+            i += 1
+        return matches
+
+
+class NamePattern:
+    """
+    A compiled body name query.
+
+    Args:
+        text (str): The name, prefix, glob or regular expression to match
+        mode (str): One of EXACT, PREFIX, GLOB or REGEX
+        ignore_case (bool): Compare names case-insensitively
+    Raises:
+        ValueError: If the mode is unknown or the regular expression is invalid
+    """
+    def __init__(self, text, mode=EXACT, ignore_case=False):
+        if mode not in MATCH_MODES:
+            raise ValueError(f'Unknown match mode "{mode}"')
+
+        self.text = text
+        self.mode = mode
+        self.ignore_case = ignore_case
+        self._regex = None
+
+        flags = re.IGNORECASE if ignore_case else 0
+        if mode == GLOB:
+            self._regex = re.compile(fnmatch.translate(text), flags)
+        elif mode == REGEX:
+            try:
+                self._regex = re.compile(text, flags)
+            except re.error as e:
+                raise ValueError(f'Invalid regular expression "{text}": {e}')
+
+    def literal_prefix(self):
+        """
+        Return the literal text every matching name must start with.
+        """
+        if self.mode in (EXACT, PREFIX):
+            return self.text
+        text = self.text
+        special = _GLOB_SPECIAL
+        if self.mode == REGEX:
+            text = text[1:] if text.startswith('^') else text
+            special = _REGEX_SPECIAL
+        for i, char in enumerate(text):
+            if char in special:
+                return text[:i]
+        return text
+
+    def matches(self, name):
+        """
+        Test a single name against the pattern.
+        """
+        if self.mode == EXACT:
+            if self.ignore_case:
+                return name.casefold() == self.text.casefold()
+            return name == self.text
+        if self.mode == PREFIX:
+            if self.ignore_case:
+                return name.casefold().startswith(self.text.casefold())
+            return name.startswith(self.text)
+        if self.mode == GLOB:
+            return self._regex.match(name) is not None
+        return self._regex.search(name) is not None
+
+    def select(self, sorted_names):
+        """
+        Return the names in a SortedNames index that match the pattern.
+        """
+        if self.mode == EXACT and not self.ignore_case:
+            return [self.text] if self.text in sorted_names.name_set else []
+
+        if self.mode in (EXACT, PREFIX):
+            candidates = sorted_names.with_prefix(self.text, self.ignore_case)
+            if self.mode == PREFIX:
+                return candidates
+            return [name for name in candidates if self.matches(name)]
+
+        # A regex may contain alternation, so only globs can be narrowed
+        # down by their literal prefix
+        prefix = self.literal_prefix() if self.mode == GLOB else ''
+        if prefix:
+            candidates = sorted_names.with_prefix(prefix, self.ignore_case)
+        else:
+            candidates = sorted_names.names
+        return [name for name in candidates if self.matches(name)]
+
+    def describe(self):
+        """
+        Return a short description for messages, e.g. 'with the name "Bolt"'.
+        """
+        if self.mode == EXACT:
+            description = f'with the name "{self.text}"'
+        else:
+            description = f'matching {self.mode} "{self.text}"'
+        if self.ignore_case:
+            description += ' (ignoring case)'
+        return description
@@ -0,0 +1,152 @@
+"""
+Snapshots of a design's selection sets, saved to a file and restored later,
+e.g. in a copy or branch of the design.
+
+Each member is saved as its entity token along with its entity type, name
+and occurrence path. Restoring looks every distinct token up once, which is
+far cheaper than searching again. Only members whose tokens no longer
+resolve are found again by name and occurrence path through the entity index.
+"""
+
+import json
+
+from . import entity_index
+from . import tracing
+
+# Version of the file layout; files in another layout are refused
+FORMAT_VERSION = 1
+
+FILE_FILTER = 'Selection set snapshots (*.json);;All files (*.*)'
+
+# Positions in a saved member row
+TYPE, NAME, PATH, TOKEN = range(4)
+
+
+def capture(design, query_group, query_name):
+    """
+    Return a snapshot of every selection set in a design.
+
+    Members of a type the entity index does not hold are saved by token
+    alone, so they can only be restored while the token still resolves.
+
+    Args:
+        design (adsk.fusion.Design): The design to take the sets from
+        query_group (str): Attribute group of the recorded search, kept so
+            restored sets can still be synced
+        query_name (str): Attribute name of the recorded search
+    Returns:
+        dict: {'format': FORMAT_VERSION, 'sets': [{'name', 'query', 'members'}]}
+        where each member is a [type, name, occurrence path, token] row
+    """
+    sets = []
+    for selection_set in design.selectionSets:
+        with tracing.span('SelectionSet.entities'):
+            entities = selection_set.entities
+        attribute = selection_set.attributes.itemByName(query_group, query_name)
+        sets.append({
+            'name': selection_set.name,
+            'query': attribute.value if attribute else None,
+            'members': [_member(entity) for entity in entities],
+        })
+    return {'format': FORMAT_VERSION, 'sets': sets}
+
+
+def _member(entity):
+    """
+    Return the [type, name, occurrence path, token] row for an entity.
+    """
+    with tracing.span('Entity.entityToken'):
+        token = entity.entityToken
+    entity_type = entity_index.entity_type_of(entity)
+    if entity_type is None:
+        return [None, None, None, token]
+    return [entity_type, entity.name, occurrence_path(entity, entity_type), token]
+
+
+def occurrence_path(entity, entity_type):
+    """
+    Return the occurrence path an entity sits at, its own path for an
+    occurrence and '' for an entity of the root component.
+    """
+    if entity_type == entity_index.OCCURRENCE:
+        return entity.fullPathName
+    context = entity.assemblyContext
+    return context.fullPathName if context else ''
+
+
+def write(path, snapshot):
+    """
+    Write a snapshot to a file as compact JSON.
+    """
+    with open(path, 'w', encoding='utf-8') as snapshot_file:
+        json.dump(snapshot, snapshot_file, separators=(',', ':'))
+
+
+def read(path):
+    """
+    Read a snapshot written by write().
+
+    Raises:
+        ValueError: If the file is not a snapshot in this format
+    """
+    with open(path, encoding='utf-8') as snapshot_file:
+        try:
+            snapshot = json.load(snapshot_file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'"{path}" is not a selection set snapshot: {e}')
+    if not isinstance(snapshot, dict) or snapshot.get('format') != FORMAT_VERSION:
+        raise ValueError(f'"{path}" is not a selection set snapshot this version can read.')
+    return snapshot
+
+
+def resolve_tokens(design, snapshot):
+    """
+    Look up every distinct member token of a snapshot once.
+
+    Returns:
+        tuple: ({token: entity} for the tokens found, [member rows] for the
+        members whose tokens were not found)
+    """
+    found = {}
+    missing = []
+    failed = set()
+    for saved_set in snapshot['sets']:
+        for member in saved_set['members']:
+            token = member[TOKEN]
+            if token in found:
+                continue
+            if token not in failed:
+                entities = tracing.call('Design.findEntityByToken', design.findEntityByToken, token)
+                if entities:
+                    found[token] = entities[0]
+                    continue
+                failed.add(token)
+                missing.append(member)
+    return found, missing
+
+
+def resolve_by_name(index, missing):
+    """
+    Find the members whose tokens did not resolve by their entity type, name
+    and occurrence path.
+
+    Args:
+        index (entity_index.EntityIndex): An up to date index of the design
+        missing (list): Member rows from resolve_tokens()
+    Returns:
+        dict: {saved token: entity} for the members found
+    """
+    # (entity type, name) -> {occurrence path: saved token}
+    wanted = {}
+    for member in missing:
+        if member[TYPE] is not None:
+            wanted.setdefault((member[TYPE], member[NAME]), {})[member[PATH]] = member[TOKEN]
+
+    found = {}
+    for (entity_type, name), tokens_by_path in wanted.items():
+        # Only look in the occurrences the members sat in
+        for entity in index.lookup(name, (entity_type,), sorted(tokens_by_path)):
+            token = tokens_by_path.get(occurrence_path(entity, entity_type))
+            if token is not None:
+                found[token] = entity
+    return found
@@ -0,0 +1,77 @@
+"""
+Classification tags on bodies, found through Fusion's attribute query
+instead of a walk of the assembly.
+
+A tag is an attribute on the native body in its component, so tagging a
+part's body once tags it in every occurrence of that part. Looking a tag up
+asks design.findAttributes() for the tagged bodies, then each tagged
+component for its occurrences, and creates the same proxies in the root
+assembly context as a name search does.
+"""
+
+from . import tracing
+
+TAG_ATTRIBUTE_GROUP = 'EmbergleamSelectionSets'
+TAG_ATTRIBUTE_NAME = 'tag'
+
+
+def tag_entities(entities, tag):
+    """
+    Tag native entities, leaving those already carrying the tag untouched.
+
+    Returns:
+        int: The number of entities whose tag was added or changed
+    """
+    changed = 0
+    for entity in entities:
+        attributes = entity.attributes
+        attribute = attributes.itemByName(TAG_ATTRIBUTE_GROUP, TAG_ATTRIBUTE_NAME)
+        if not attribute or attribute.value != tag:
+            attributes.add(TAG_ATTRIBUTE_GROUP, TAG_ATTRIBUTE_NAME, tag)
+            changed += 1
+    return changed
+
+
+def tag_values(design):
+    """
+    Return the distinct tags used in a design, sorted.
+    """
+    with tracing.span('Design.findAttributes'):
+        attributes = design.findAttributes(TAG_ATTRIBUTE_GROUP, TAG_ATTRIBUTE_NAME)
+    return sorted({attribute.value for attribute in attributes})
+
+
+def find_tagged(design, tag):
+    """
+    Return the entities tagged with tag as proxies in the root assembly
+    context, one for every occurrence of each tagged entity's component.
+    """
+    with tracing.span('Design.findAttributes'):
+        attributes = design.findAttributes(TAG_ATTRIBUTE_GROUP, TAG_ATTRIBUTE_NAME)
+
+    root_comp = design.rootComponent
+    root_id = root_comp.id
+    # component id -> occurrences of the component in the root context
+    occurrences_by_component = {}
+    entities = []
+    for attribute in attributes:
+        if attribute.value != tag:
+            continue
+        entity = attribute.parent
+        if entity is None:
+            continue
+        component = entity.parentComponent
+        comp_id = component.id
+        if comp_id == root_id:
+            entities.append(entity)
+            continue
+
+        occurrences = occurrences_by_component.get(comp_id)
+        if occurrences is None:
+            with tracing.span('Component.allOccurrencesByComponent'):
+                occurrences = list(root_comp.allOccurrencesByComponent(component))
+            occurrences_by_component[comp_id] = occurrences
+        entities.extend(tracing.call(type(entity).__name__ + '.createForAssemblyContext',
+                                     entity.createForAssemblyContext, occ)
+                        for occ in occurrences)
+    return entities
@@ -0,0 +1,163 @@
+"""
+Runs long traversals a slice at a time so Fusion's UI stays responsive.
+
+A task wraps a generator that yields (done, total) progress after each unit
+of work. Each slice runs from a custom event, does as much work as fits in
+the frame budget, updates a progress dialog and then fires the event again
+so Fusion can process input and repaint before the next slice.
+"""
+
+import adsk.core
+import time
+import traceback
+
+from . import tracing
+
+CUSTOM_EVENT_ID = 'EmbergleamSelectionSetsSlice'
+
+# Target time spent working per slice, in seconds
+DEFAULT_FRAME_BUDGET = 0.03
+
+# The task currently running, if any; only one runs at a time
+_active_task = None
+
+
+class SliceEventHandler(adsk.core.CustomEventHandler):
+    """
+    Runs the next slice of the active task each time the custom event fires.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        if _active_task:
+            tracing.resume(_active_task.trace, 'SlicedTask.run_slice', _active_task.run_slice)
+
+
+class SlicedTask:
+    """
+    A cancellable generator driven one slice at a time.
+
+    Args:
+        steps (generator): Yields (done, total) after each unit of work
+        on_done (callable): Called with no arguments when steps is exhausted
+        title (str): Title of the progress dialog
+        message (str): Progress dialog message, using %v and %m for done and total
+        frame_budget (float, optional): Seconds of work per slice
+    """
+    def __init__(self, steps, on_done, title, message, frame_budget=DEFAULT_FRAME_BUDGET):
+        self.steps = steps
+        self.on_done = on_done
+        self.title = title
+        self.message = message
+        self.frame_budget = frame_budget
+        self.progress_dialog = None
+        self.custom_event = None
+        self.handler = None
+        self.trace = None
+
+    def start(self):
+        """
+        Run the first slice straight away and, if there is more to do,
+        continue from custom events behind a progress dialog.
+        """
+        global _active_task
+        app = adsk.core.Application.get()
+
+        # Small designs finish in the first slice without any dialog
+        if self._work():
+            self.on_done()
+            return
+
+        _active_task = self
+        self.trace = tracing.hold()
+        self.custom_event = app.registerCustomEvent(CUSTOM_EVENT_ID)
+        self.handler = SliceEventHandler()
+        self.custom_event.add(self.handler)
+
+        self.progress_dialog = app.userInterface.createProgressDialog()
+        self.progress_dialog.isCancelButtonShown = True
+        self.progress_dialog.show(self.title, self.message, 0, 1, 0)
+
+        app.fireCustomEvent(CUSTOM_EVENT_ID)
+
+    def run_slice(self):
+        """
+        Do one slice of work and schedule the next, finishing or cancelling
+        the task as needed.
+        """
+        app = adsk.core.Application.get()
+        try:
+            if self.progress_dialog.wasCancelled:
+                self._finish()
+                return
+
+            if self._work():
+                self._finish()
+                self.on_done()
+                return
+
+            app.fireCustomEvent(CUSTOM_EVENT_ID)
+
+        except:
+            self._finish()
+            app.userInterface.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+    def _work(self):
+        """
+        Advance the generator until the frame budget has been spent, so the
+        amount of work per slice follows how long each step takes, and
+        update the progress dialog.
+
+        Returns:
+            bool: True when the generator is exhausted
+        """
+        end_time = time.perf_counter() + self.frame_budget
+        done = total = 0
+        try:
+            with tracing.span('SlicedTask.chunk'):
+                while True:
+                    done, total = next(self.steps)
+                    if time.perf_counter() >= end_time:
+                        break
+        except StopIteration:
+            return True
+
+        if self.progress_dialog:
+            self.progress_dialog.maximumValue = max(total, 1)
+            self.progress_dialog.progressValue = done
+        return False
+
+    def _finish(self):
+        """
+        Close the dialog, release the custom event and drop the generator.
+        """
+        global _active_task
+        app = adsk.core.Application.get()
+        if self.progress_dialog:
+            self.progress_dialog.hide()
+            self.progress_dialog = None
+        if self.custom_event:
+            self.custom_event.remove(self.handler)
+            app.unregisterCustomEvent(CUSTOM_EVENT_ID)
+            self.custom_event = None
+        self.steps.close()
+        tracing.release(self.trace)
+        self.trace = None
+        if _active_task is self:
+            _active_task = None
+
+
+def is_running():
+    """
+    Return True if a sliced task is in progress.
+    """
+    return _active_task is not None
+
+
+def cancel():
+    """
+    Stop the running task, if any, without calling its on_done callback.
+    """
+    if _active_task:
+        _active_task._finish()
@@ -3,13 +3,64 @@ Fusion 360 Camera Toggle Add-in
 Toggles between Perspective and Orthographic camera modes
 """
 
-import adsk.core, traceback
+import adsk.core, adsk.fusion, traceback
+import math
 import os
+import time
+
+from . import animation
+from . import camera_memory
+from . import handler_registry
+from . import projection
+from . import tracing
 
 # Global variables
 _app = None
 _ui = None
-_handlers = []
+_handlers = handler_registry.HandlerRegistry()
+_toolbar = None
+# Camera type the toggle button currently offers to switch away from
+_buttonCameraType = None
+
+# Set once the toolbar controls exist, which waits for the Design workspace
+_controlsCreated = False
+
+# Workspace the toolbar controls live in
+DESIGN_WORKSPACE_ID = 'FusionSolidEnvironment'
+
+# Set while a button sync is queued, so a burst of camera changes
+# only checks the camera once
+_syncPending = False
+
+# Custom event that runs the queued button sync
+SYNC_EVENT_ID = 'EmbergleamToggleCameraSync'
+
+# Command and button for the toggle
+CMD_ID = 'CameraToggle'
+ADDIN_PATH = os.path.dirname(os.path.realpath(__file__))
+
+# Menu command that toggles with a dolly zoom animation
+ANIMATED_CMD_ID = 'CameraToggleAnimated'
+
+# Narrowest field of view a dolly zoom reaches, standing in for orthographic
+DOLLY_ZOOM_MIN_ANGLE = math.radians(2.0)
+
+# Button name and icon folder, keyed by whether the camera is in perspective
+BUTTON_STATES = {
+    True: ('Switch to Orthographic', 'resources_orthographic'),
+    False: ('Switch to Perspective', 'resources_perspective'),
+}
+
+# Commands that switch every open document to one camera mode: command id ->
+# (name, tooltip, icon folder, camera type)
+SET_ALL_COMMANDS = {
+    'CameraSetAllOrtho': ('Set All to Orthographic',
+                          'Switch the camera of every open document to Orthographic',
+                          'resources_orthographic', adsk.core.CameraTypes.OrthographicCameraType),
+    'CameraSetAllPersp': ('Set All to Perspective',
+                          'Switch the camera of every open document to Perspective',
+                          'resources_perspective', adsk.core.CameraTypes.PerspectiveCameraType),
+}
 
 def run(context):
     """
@@ -19,58 +70,73 @@ def run(context):
         context (dict[str, Any]): A dictionary of runtime parameters passed by 
                                   Fusion 360 when executing the Add-In
     """
-    global _app, _ui
+    global _app, _ui, _toolbar
+    startTime = time.perf_counter()
     try:
         # Get the application and the UI for this Add-In
         _app = adsk.core.Application.get()
         _ui = _app.userInterface
+        _toolbar = ToolbarRegistry(_ui)
         
-        # Get the path to the Add-In folder
-        addinPath = os.path.dirname(os.path.realpath(__file__))
-        orthoIconPath = os.path.join(addinPath, 'resources_orthographic')
-        perspIconPath = os.path.join(addinPath, 'resources_perspective')
-        
-        # Create both command definitions and handlers for Orthographic ...
-        cmdDefOrtho = _ui.commandDefinitions.itemById('CameraToggleOrtho')
-        if not cmdDefOrtho:
-            cmdDefOrtho = _ui.commandDefinitions.addButtonDefinition(
-                'CameraToggleOrtho',
-                'Switch to Orthographic',
+        # Create the command definition and handler for the toggle button, its
+        # name and icon are set by updateButton() to match the camera
+        cmdDef = _ui.commandDefinitions.itemById(CMD_ID)
+        if not cmdDef:
+            name, iconFolder = BUTTON_STATES[False]
+            cmdDef = _ui.commandDefinitions.addButtonDefinition(
+                CMD_ID,
+                name,
                 'Toggle between Perspective and Orthographic camera modes',
-                orthoIconPath
+                os.path.join(ADDIN_PATH, iconFolder)
             )
         # Connect to the command created event
-        onCommandCreatedOrtho = CommandCreatedHandler()
-        cmdDefOrtho.commandCreated.add(onCommandCreatedOrtho)
-        _handlers.append(onCommandCreatedOrtho)
-        
-        # ... and Perspective
-        cmdDefPersp = _ui.commandDefinitions.itemById('CameraTogglePersp')
-        if not cmdDefPersp:
-            cmdDefPersp = _ui.commandDefinitions.addButtonDefinition(
-                'CameraTogglePersp',
-                'Switch to Perspective',
-                'Toggle between Perspective and Orthographic camera modes',
-                perspIconPath
+        onCommandCreated = CommandCreatedHandler()
+        cmdDef.commandCreated.add(onCommandCreated)
+        _handlers.keep(onCommandCreated)
+
+        # Create the command definition and handler for the animated toggle
+        animatedCmdDef = _ui.commandDefinitions.itemById(ANIMATED_CMD_ID)
+        if not animatedCmdDef:
+            animatedCmdDef = _ui.commandDefinitions.addButtonDefinition(
+                ANIMATED_CMD_ID,
+                'Toggle Camera (Animated)',
+                'Toggle between Perspective and Orthographic camera modes with a dolly zoom',
+                os.path.join(ADDIN_PATH, BUTTON_STATES[True][1])
             )
-        # Connect to the command created event
-        onCommandCreatedPersp = CommandCreatedHandler()
-        cmdDefPersp.commandCreated.add(onCommandCreatedPersp)
-        _handlers.append(onCommandCreatedPersp)
-
-        # Create the toolbar button
+        onAnimatedCreated = CommandCreatedHandler(animated=True)
+        animatedCmdDef.commandCreated.add(onAnimatedCreated)
+        _handlers.keep(onAnimatedCreated)
+
+        # Create the command definitions and handlers for the set all commands
+        for setAllCmdId, (name, tooltip, iconFolder, cameraType) in SET_ALL_COMMANDS.items():
+            setAllCmdDef = _ui.commandDefinitions.itemById(setAllCmdId)
+            if not setAllCmdDef:
+                setAllCmdDef = _ui.commandDefinitions.addButtonDefinition(
+                    setAllCmdId, name, tooltip, os.path.join(ADDIN_PATH, iconFolder))
+            onSetAllCreated = SetAllCommandCreatedHandler(cameraType)
+            setAllCmdDef.commandCreated.add(onSetAllCreated)
+            _handlers.keep(onSetAllCreated)
+
+        # The toolbar controls need the Design workspace and a viewport, so
+        # unless they are ready now creating them waits until they are
         try:
-            createButtons(adsk.core.Application.get())
+            started = _ui.activeWorkspace.id == DESIGN_WORKSPACE_ID and startControls()
         except FusionNullObjectError as e:
+            started = True
             if _ui:
                 _ui.messageBox(f'Fusion Error:\n{e}')
             else:
                 print('Fusion Error:', e)
         except:
-            # Button creation failed, try again using a WorkspaceActivatedHandler
+            # Viewport not ready yet
+            started = False
+        if not started:
+            # Create the controls when the Design workspace is activated
             onWorkspaceActivated = WorkspaceActivatedHandler()
             _ui.workspaceActivated.add(onWorkspaceActivated)
-            _handlers.append(onWorkspaceActivated)
+            _handlers.keep(onWorkspaceActivated)
+
+        logTime('run()', startTime, '' if started else ', controls deferred until the Design workspace is active')
         
     # Something went horribly wrong
     except:
@@ -87,36 +153,47 @@ def stop(context):
         context (dict[str, Any]): A dictionary of runtime parameters passed by 
                                   Fusion 360 when stopping the Add-In
     """
-    global _ui, _handlers
+    global _ui, _handlers, _toolbar, _buttonCameraType, _syncPending, _controlsCreated
     try:
         if not _ui:
             _app = adsk.core.Application.get()
             _ui = _app.userInterface
+        if not _toolbar:
+            _toolbar = ToolbarRegistry(_ui)
         
-        # Get the Solid tab and Inspect panel
-        allToolbarTabs = _ui.allToolbarTabs
-        solidTab = allToolbarTabs.itemById('SolidTab')
-        if solidTab:
-            inspectPanel = solidTab.toolbarPanels.itemById('InspectPanel')
-            if inspectPanel:
-                # Remove both possible buttons
-                buttonControlOrtho = inspectPanel.controls.itemById('CameraToggleOrtho')
-                if buttonControlOrtho:
-                    buttonControlOrtho.deleteMe()
-                    
-                buttonControlPersp = inspectPanel.controls.itemById('CameraTogglePersp')
-                if buttonControlPersp:
-                    buttonControlPersp.deleteMe()
+        # Remove the buttons from the Inspect panel
+        animation.cancel()
+        cmdIds = [CMD_ID, ANIMATED_CMD_ID] + list(SET_ALL_COMMANDS)
+        try:
+            for cmdId in cmdIds:
+                _toolbar.deleteControl(cmdId)
+        except FusionNullObjectError:
+            # No SOLID tab or INSPECT panel, so no buttons either
+            pass
         
-        # Remove both command definitions
-        cmdDefOrtho = _ui.commandDefinitions.itemById('CameraToggleOrtho')
-        if cmdDefOrtho:
-            cmdDefOrtho.deleteMe()
-            
-        cmdDefPersp = _ui.commandDefinitions.itemById('CameraTogglePersp')
-        if cmdDefPersp:
-            cmdDefPersp.deleteMe()
+        # Remove the command definitions
+        for cmdId in cmdIds:
+            cmdDef = _toolbar.commandDefinition(cmdId)
+            if cmdDef:
+                cmdDef.deleteMe()
+        _toolbar.reset()
+        _buttonCameraType = None
+        camera_memory.clear()
         
+        # Disconnect the application events
+        app = adsk.core.Application.get()
+        for handler in _handlers:
+            if isinstance(handler, WorkspaceActivatedHandler):
+                _ui.workspaceActivated.remove(handler)
+            elif isinstance(handler, CameraChangedHandler):
+                app.cameraChanged.remove(handler)
+            elif isinstance(handler, DocumentActivatedHandler):
+                app.documentActivated.remove(handler)
+        # Unregistering the sync event also drops its handler
+        app.unregisterCustomEvent(SYNC_EVENT_ID)
+        _syncPending = False
+        _controlsCreated = False
+
         # Clear handlers
         _handlers.clear()
         
@@ -125,6 +202,57 @@ def stop(context):
         if _ui:
             _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
+def startControls():
+    """
+    Method for the part of startup that needs the Design workspace: creating
+    the toolbar controls and keeping the button in sync with the camera.
+    Does nothing once it has succeeded
+
+    Returns:
+        bool: True if the controls exist, False if there is no viewport yet
+    """
+    global _controlsCreated
+    if _controlsCreated:
+        return True
+    if not _app.activeDocument:
+        return False
+    startTime = time.perf_counter()
+
+    # Create the toolbar buttons
+    createButtons(_app)
+
+    # Keep the button in step with camera changes made outside the Add-In,
+    # e.g. from Display Settings, and with the document that is active
+    syncEvent = _app.registerCustomEvent(SYNC_EVENT_ID)
+    onSyncButton = SyncButtonHandler()
+    syncEvent.add(onSyncButton)
+    _handlers.keep(onSyncButton)
+
+    onCameraChanged = CameraChangedHandler()
+    _app.cameraChanged.add(onCameraChanged)
+    _handlers.keep(onCameraChanged)
+
+    onDocumentActivated = DocumentActivatedHandler()
+    _app.documentActivated.add(onDocumentActivated)
+    _handlers.keep(onDocumentActivated)
+
+    _controlsCreated = True
+    logTime('creating controls', startTime)
+    return True
+
+def logTime(task, startTime, note=''):
+    """
+    Method to log how long part of the Add-In's startup took to the Text
+    Commands window
+
+    Args:
+        task (String): What was timed
+        startTime (float): time.perf_counter() when the task started
+        note (String, optional): Text added to the end of the message
+    """
+    elapsed = (time.perf_counter() - startTime) * 1000.0
+    _app.log(f'Camera Toggle: {task} took {elapsed:.1f} ms{note}')
+
 def createButtons(app):
     """
     Common method to create the buttons that this Add-In uses 
@@ -132,66 +260,440 @@ def createButtons(app):
     Args:
         app (adsk.core.Application): The running Fusion 360 application instance 
     """
-    global _ui
+    global _buttonCameraType
     
     # Get the viewport - this will throw as exception is the viewport is not available
-    viewport = app.activeViewport
-    currentCamera = viewport.camera
-
-    # Find the Inspect panel under the SolidTab toolbar
-    allToolbarTabs = _ui.allToolbarTabs
-    solidTab = requiredNotNone(allToolbarTabs.itemById('SolidTab'), 'SOLID tab not found')
-    if solidTab:
-        inspectPanel = requiredNotNone(solidTab.toolbarPanels.itemById('InspectPanel'), 'INSPECT panel not found')
-        if inspectPanel:
-            # Delete any existing buttons
-            toggleOrthoButton = inspectPanel.controls.itemById('CameraToggleOrtho')
-            if toggleOrthoButton:
-                toggleOrthoButton.deleteMe()
-            togglePerspButton = inspectPanel.controls.itemById('CameraTogglePersp')
-            if togglePerspButton:
-                togglePerspButton.deleteMe()
-
-            # Determine which button should be shown
-            if currentCamera.cameraType == adsk.core.CameraTypes.PerspectiveCameraType:
-                swapButtons('CameraTogglePersp', 'CameraToggleOrtho')
-            else:
-                swapButtons('CameraToggleOrtho', 'CameraTogglePersp')
+    with tracing.span('Application.activeViewport'):
+        viewport = app.activeViewport
+    with tracing.span('Viewport.camera'):
+        currentCamera = viewport.camera
+
+    # Set the button up from scratch to match the current camera
+    _buttonCameraType = None
+    updateButton(currentCamera.cameraType)
+
+    # The animated toggle and set all commands go in the panel's menu rather
+    # than the toolbar
+    for menuCmdId in [ANIMATED_CMD_ID] + list(SET_ALL_COMMANDS):
+        if not _toolbar.control(menuCmdId):
+            _toolbar.addControl(menuCmdId, False)
+
+def updateButton(cameraType):
+    """
+    Method to make the button offer the switch away from the given camera mode.
+    The one button is kept in the toolbar and only its name and icon change,
+    so Fusion does not have to lay the toolbar out again
+
+    Args:
+        cameraType (adsk.core.CameraTypes): The camera mode now in use
+    """
+    global _buttonCameraType
+
+    # Note: 'Perspective with Ortho Faces' is shown as regular Perspective mode
+    isPerspective = cameraType == adsk.core.CameraTypes.PerspectiveCameraType
+
+    # The button might already be correct if user changed mode externally
+    button = _toolbar.control(CMD_ID)
+    if button and _buttonCameraType == isPerspective:
+        return
+
+    # Change the name and icon of the existing command definition
+    cmdDef = requiredNotNone(_toolbar.commandDefinition(CMD_ID),
+                             f'No command definition for {CMD_ID}')
+    name, iconFolder = BUTTON_STATES[isPerspective]
+    with tracing.span('CommandDefinition.name='):
+        cmdDef.name = name
+    with tracing.span('CommandDefinition.resourceFolder='):
+        cmdDef.resourceFolder = os.path.join(ADDIN_PATH, iconFolder)
+
+    # The button is only added the first time, or if Fusion removed it
+    if not button:
+        _toolbar.addControl(CMD_ID)
+    _buttonCameraType = isPerspective
+
+def requestButtonSync():
+    """
+    Method to queue a check of the camera mode for the button. Requests made
+    before the queued check runs are merged into it, so a burst of orbit or
+    zoom events costs at most one check per UI frame
+    """
+    global _syncPending
+    if _syncPending:
+        return
+    _syncPending = True
+    if not _app.fireCustomEvent(SYNC_EVENT_ID):
+        _syncPending = False
+
+def syncButton():
+    """
+    Method to update the button to match the camera of the active viewport
+    """
+    global _syncPending
+    _syncPending = False
+
+    # Nothing to match while no document is open
+    if not _app.activeDocument:
+        return
+    with tracing.span('Application.activeViewport'):
+        viewport = _app.activeViewport
+    with tracing.span('Viewport.camera'):
+        currentCamera = viewport.camera
+    updateButton(currentCamera.cameraType)
+
+def switchCamera(viewport, currentCamera, documentKey, cameraType):
+    """
+    Method to switch a viewport's camera to the other projection while keeping
+    the same visible area. The caller refreshes the viewport and the button
+
+    Args:
+        viewport (adsk.core.Viewport): The viewport to change
+        currentCamera (adsk.core.Camera): The viewport's camera, in the other mode
+        documentKey (String): The creation id of the viewport's document
+        cameraType (adsk.core.CameraTypes): The camera mode to switch to
+    """
+    # Save current view info
+    eye = currentCamera.eye
+    target = currentCamera.target
+    upVector = currentCamera.upVector
+    eyeArray = tuple(eye.asArray())
+    targetArray = tuple(target.asArray())
+    upArray = tuple(upVector.asArray())
+    
+    # The last toggle in this document is remembered, so going back
+    # to a view that has not moved since can restore it exactly
+    if cameraType == adsk.core.CameraTypes.OrthographicCameraType:
+        # Currently Perspective - Switching TO Orthographic
+        perspectiveView = camera_memory.PerspectiveView(
+            eyeArray, targetArray, upArray, currentCamera.perspectiveAngle)
+        orthographicView = camera_memory.recall(documentKey, perspectiveView)
+        
+        if orthographicView:
+            # Back to the extents this view was toggled from
+            horizontalSize, verticalSize = orthographicView.extents
+        else:
+            # Get viewport aspect ratio
+            viewportWidth = viewport.width
+            viewportHeight = viewport.height
+            aspectRatio = viewportWidth / viewportHeight if viewportHeight > 0 else 1.0
+            
+            # Calculate the vertical and horizontal sizes visible at the target distance
+            horizontalSize, verticalSize = projection.orthographic_extents(
+                eyeArray, targetArray, perspectiveView.perspective_angle, aspectRatio)
+        
+        # Change the current camera to an orthographic camera
+        currentCamera.cameraType = adsk.core.CameraTypes.OrthographicCameraType
+        currentCamera.isSmoothTransition = False
+        
+        # Assign the changed camera to the viewport
+        with tracing.span('Viewport.camera='):
+            viewport.camera = currentCamera
+
+        # Get the new Camera and set it extents
+        with tracing.span('Viewport.camera'):
+            attachedCamera = viewport.camera
+        attachedCamera.isSmoothTransition = False
+        attachedCamera.setExtents(horizontalSize, verticalSize)
+
+        # Assign the final camera to the viewport
+        with tracing.span('Viewport.camera='):
+            viewport.camera = attachedCamera
+
+        camera_memory.remember(documentKey, perspectiveView, camera_memory.OrthographicView(
+            eyeArray, targetArray, upArray, (horizontalSize, verticalSize)))
+        
+    else:
+        # Currently Orthographic - Switching TO Perspective
+        # Get the current sizes from the current camera's extents
+        _, horizontalSize, verticalSize = currentCamera.getExtents()
+        orthographicView = camera_memory.OrthographicView(
+            eyeArray, targetArray, upArray, (horizontalSize, verticalSize))
+        perspectiveView = camera_memory.recall(documentKey, orthographicView)
+
+        if perspectiveView:
+            # The view has not moved since the last toggle, so put the
+            # perspective camera back as it was in one assignment
+            currentCamera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType
+            currentCamera.isSmoothTransition = False
+            currentCamera.eye = adsk.core.Point3D.create(*perspectiveView.eye)
+            currentCamera.target = adsk.core.Point3D.create(*perspectiveView.target)
+            currentCamera.upVector = adsk.core.Vector3D.create(*perspectiveView.up_vector)
+            currentCamera.perspectiveAngle = perspectiveView.perspective_angle
+
+            with tracing.span('Viewport.camera='):
+                viewport.camera = currentCamera
+
+        else:
+            # Change the current camera to a perspective camera
+            currentCamera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType
+            currentCamera.isSmoothTransition = False
+            currentCamera.isFitView = True
+
+            # Assign the changed camera to the viewport
+            with tracing.span('Viewport.camera='):
+                viewport.camera = currentCamera
+
+            # Get the new Camera
+            with tracing.span('Viewport.camera'):
+                attachedCamera = viewport.camera
+            perspectiveAngle = attachedCamera.perspectiveAngle
+
+            # Calculate new eye position maintaining the same direction,
+            # at the distance needed for this vertical size
+            newEyeArray = projection.perspective_eye(
+                eyeArray, targetArray, verticalSize, perspectiveAngle)
+
+            # Set the new Camera's new eye
+            attachedCamera.eye = adsk.core.Point3D.create(*newEyeArray)
+            attachedCamera.target = target
+            attachedCamera.upVector = upVector
+            attachedCamera.isSmoothTransition = False
+
+            # Assign the final camera to the viewport
+            with tracing.span('Viewport.camera='):
+                viewport.camera = attachedCamera
 
-def swapButtons(oldCmdId, newCmdId):
+            perspectiveView = camera_memory.PerspectiveView(
+                newEyeArray, targetArray, upArray, perspectiveAngle)
+
+        camera_memory.remember(documentKey, perspectiveView, orthographicView)
+
+def animateCamera(viewport, currentCamera, documentKey, cameraType):
+    """
+    Method to switch a viewport's camera to the other projection with a dolly
+    zoom: the field of view narrows towards orthographic, or widens from it,
+    while the eye moves to keep the same height visible at the target. The
+    frames are drawn by an animation.Animation, after which the camera and
+    button end up as switchCamera() and updateButton() would leave them
+
+    Args:
+        viewport (adsk.core.Viewport): The viewport to change
+        currentCamera (adsk.core.Camera): The viewport's camera, in the other mode
+        documentKey (String): The creation id of the viewport's document
+        cameraType (adsk.core.CameraTypes): The camera mode to switch to
+    """
+    eyeArray = tuple(currentCamera.eye.asArray())
+    targetArray = tuple(currentCamera.target.asArray())
+    upArray = tuple(currentCamera.upVector.asArray())
+    perspectiveAngle = currentCamera.perspectiveAngle
+    toOrthographic = cameraType == adsk.core.CameraTypes.OrthographicCameraType
+
+    if toOrthographic:
+        # Zoom in from the current field of view towards orthographic
+        _, verticalSize = projection.orthographic_extents(eyeArray, targetArray, perspectiveAngle, 1.0)
+        startAngle, endAngle = perspectiveAngle, DOLLY_ZOOM_MIN_ANGLE
+    else:
+        # Zoom out from nearly orthographic to the perspective field of view
+        _, horizontalSize, verticalSize = currentCamera.getExtents()
+        startAngle, endAngle = DOLLY_ZOOM_MIN_ANGLE, perspectiveAngle
+
+    # Every frame is a perspective camera
+    camera = currentCamera
+    camera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType
+    camera.isSmoothTransition = False
+
+    def draw(fraction):
+        eye, angle = projection.dolly_zoom(eyeArray, targetArray, verticalSize, startAngle, endAngle, fraction)
+        camera.eye = adsk.core.Point3D.create(*eye)
+        camera.perspectiveAngle = angle
+        with tracing.span('Viewport.camera='):
+            viewport.camera = camera
+        tracing.call('Viewport.refresh', viewport.refresh)
+
+    def finish():
+        if toOrthographic:
+            # Switch from the view the zoom started at, as a toggle would
+            camera.eye = adsk.core.Point3D.create(*eyeArray)
+            camera.perspectiveAngle = perspectiveAngle
+            switchCamera(viewport, camera, documentKey, cameraType)
+            tracing.call('Viewport.refresh', viewport.refresh)
+        else:
+            # The last frame is the perspective camera a toggle would give
+            draw(1.0)
+            eye, _ = projection.dolly_zoom(eyeArray, targetArray, verticalSize, startAngle, endAngle, 1.0)
+            camera_memory.remember(
+                documentKey,
+                camera_memory.PerspectiveView(eye, targetArray, upArray, perspectiveAngle),
+                camera_memory.OrthographicView(eyeArray, targetArray, upArray, (horizontalSize, verticalSize)))
+        updateButton(cameraType)
+
+    animation.Animation(draw, finish).start()
+
+def setAllCameras(cameraType):
+    """
+    Method to switch the camera of every open design to one camera mode.
+    Each design is activated in turn, since the API only reaches the active
+    viewport, and the document that was active is activated again
+    afterwards, even if one of them fails. Documents that are not designs,
+    such as drawings, are skipped. Each changed viewport is refreshed once
+    and the button is updated once at the end
+
+    Args:
+        cameraType (adsk.core.CameraTypes): The camera mode to switch to
+    Returns:
+        int: The number of viewports that were changed
+    """
+    animation.complete()
+    activeDocument = _app.activeDocument
+    if not activeDocument:
+        return 0
+    activeKey = activeDocument.creationId
+
+    otherDesigns = []
+    for document in _app.documents:
+        documentKey = document.creationId
+        if documentKey != activeKey and adsk.fusion.FusionDocument.cast(document):
+            otherDesigns.append((documentKey, document))
+
+    changed = 0
+    try:
+        for documentKey, document in otherDesigns:
+            tracing.call('Document.activate', document.activate)
+            if setActiveCamera(documentKey, cameraType):
+                changed += 1
+    finally:
+        # Whatever happened, leave the user in the document they were in
+        if otherDesigns:
+            tracing.call('Document.activate', activeDocument.activate)
+
+    if adsk.fusion.FusionDocument.cast(activeDocument) and setActiveCamera(activeKey, cameraType):
+        changed += 1
+
+    updateButton(cameraType)
+    return changed
+
+def setActiveCamera(documentKey, cameraType):
     """
-    Method to change which button is shown when the camera mode is switched 
+    Method to switch the active viewport to a camera mode, refreshing it
+    once. A viewport already in that mode is left alone
 
     Args:
-        oldCmdId (String): The command identifier for the old button
-        newCmdId (String): The command identifier for the new button
-    """
-    global _ui
-
-    # Swap the button to show the opposite command
-    allToolbarTabs = _ui.allToolbarTabs
-    solidTab = requiredNotNone(allToolbarTabs.itemById('SolidTab'), 'SOLID tab not found')
-    if solidTab:
-        inspectPanel = requiredNotNone(solidTab.toolbarPanels.itemById('InspectPanel'), 'INSPECT panel not found')
-        if inspectPanel:
-            # Only swap if the old button exists and new button doesn't
-            # button might already be correct if user changed mode externally
-            oldButton = inspectPanel.controls.itemById(oldCmdId)
-            newButton = inspectPanel.controls.itemById(newCmdId)
-
-            # First check for the oldButton and delete it if necessary
-            if oldButton:
-                oldButton.deleteMe()
-
-            # Is the required button missing
-            if not newButton:
-                # Create the new one linked to its command definition
-                newCmdDef = requiredNotNone(_ui.commandDefinitions.itemById(newCmdId), f'No command definition for {newCmdId}')
-                # Add the button to the Inspect panel
-                newButton = inspectPanel.controls.addCommand(newCmdDef, newCmdId, False)
-                # Make sure it is visible
-                newButton.isPromoted = True
-                newButton.isPromotedByDefault = True
+        documentKey (str): The creation id of the active document
+        cameraType (adsk.core.CameraTypes): The camera mode to switch to
+    Returns:
+        bool: True if the viewport was changed
+    """
+    with tracing.span('Application.activeViewport'):
+        viewport = _app.activeViewport
+    with tracing.span('Viewport.camera'):
+        currentCamera = viewport.camera
+    isPerspective = cameraType == adsk.core.CameraTypes.PerspectiveCameraType
+    if (currentCamera.cameraType == adsk.core.CameraTypes.PerspectiveCameraType) == isPerspective:
+        return False
+    switchCamera(viewport, currentCamera, documentKey, cameraType)
+    tracing.call('Viewport.refresh', viewport.refresh)
+    return True
+
+class ToolbarRegistry:
+    """
+    Cache of the toolbar objects this Add-In works with, so a toggle does not
+    walk the tab, panel, control and command definition collections each time
+
+    Cached objects are checked with isValid before they are used and only
+    looked up again when Fusion has rebuilt them, e.g. after a workspace or
+    panel is recreated.
+
+    Args:
+        ui (adsk.core.UserInterface): The user interface the toolbar belongs to
+    """
+    def __init__(self, ui):
+        self.ui = ui
+        self._inspectPanel = None
+        # Command id -> control in the Inspect panel, or None when there is none
+        self._controls = {}
+        # Command id -> command definition
+        self._commandDefinitions = {}
+
+    def reset(self):
+        """
+        Forget every cached object so they are looked up again on next use
+        """
+        self._inspectPanel = None
+        self._controls.clear()
+        self._commandDefinitions.clear()
+
+    def inspectPanel(self):
+        """
+        Returns the Inspect panel under the SolidTab toolbar
+
+        Raises:
+            FusionNullObjectError: When the SOLID tab or INSPECT panel is missing
+        Returns:
+            adsk.core.ToolbarPanel: The Inspect panel
+        """
+        if self._inspectPanel is None or not self._inspectPanel.isValid:
+            allToolbarTabs = self.ui.allToolbarTabs
+            solidTab = requiredNotNone(tracing.call('ToolbarTabs.itemById', allToolbarTabs.itemById, 'SolidTab'),
+                                       'SOLID tab not found')
+            self._inspectPanel = requiredNotNone(tracing.call('ToolbarPanels.itemById', solidTab.toolbarPanels.itemById, 'InspectPanel'),
+                                                 'INSPECT panel not found')
+            # Controls found in an old panel are gone with it
+            self._controls.clear()
+        return self._inspectPanel
+
+    def control(self, cmdId):
+        """
+        Returns the Inspect panel button for a command, or None if it has none
+
+        Args:
+            cmdId (String): The command identifier of the button
+        """
+        if cmdId in self._controls:
+            control = self._controls[cmdId]
+            # A missing button stays missing until this registry adds it
+            if control is None or control.isValid:
+                return control
+        inspectPanel = self.inspectPanel()
+        control = tracing.call('ToolbarControls.itemById', inspectPanel.controls.itemById, cmdId)
+        self._controls[cmdId] = control
+        return control
+
+    def commandDefinition(self, cmdId):
+        """
+        Returns the command definition for cmdId, or None if it does not exist
+
+        Args:
+            cmdId (String): The command identifier
+        """
+        cmdDef = self._commandDefinitions.get(cmdId)
+        if cmdDef is None or not cmdDef.isValid:
+            cmdDef = tracing.call('CommandDefinitions.itemById', self.ui.commandDefinitions.itemById, cmdId)
+            self._commandDefinitions[cmdId] = cmdDef
+        return cmdDef
+
+    def addControl(self, cmdId, isPromoted=True):
+        """
+        Adds a button for a command to the Inspect panel
+
+        Args:
+            cmdId (String): The command identifier of the button
+            isPromoted (bool, optional): Whether the button is shown in the toolbar
+                                         as well as the panel's menu. Defaults to True
+        Raises:
+            FusionNullObjectError: When the command definition does not exist
+        Returns:
+            adsk.core.CommandControl: The new button
+        """
+        cmdDef = requiredNotNone(self.commandDefinition(cmdId), f'No command definition for {cmdId}')
+        inspectPanel = self.inspectPanel()
+        control = tracing.call('ToolbarControls.addCommand', inspectPanel.controls.addCommand, cmdDef, cmdId, False)
+        if isPromoted:
+            # Make sure it is visible
+            control.isPromoted = True
+            control.isPromotedByDefault = True
+        self._controls[cmdId] = control
+        return control
+
+    def deleteControl(self, cmdId):
+        """
+        Removes the button for a command from the Inspect panel, if it has one
+
+        Args:
+            cmdId (String): The command identifier of the button
+        """
+        control = self.control(cmdId)
+        if control:
+            tracing.call('CommandControl.deleteMe', control.deleteMe)
+        self._controls[cmdId] = None
 
 class FusionApiError(Exception):
     """ Base class for Fusion API errors raised by our wrapper code. """
@@ -218,7 +720,8 @@ def requiredNotNone(obj, message='Unexpected None from Fusion API'):
 
 class WorkspaceActivatedHandler(adsk.core.WorkspaceEventHandler):
     """
-    Handler that is called whenever the Workspace in Fusion 360 is Activated 
+    Handler that is called whenever the Workspace in Fusion 360 is Activated,
+    until the toolbar controls have been created
 
     Args:
         adsk (WorkspaceEventHandler): Abstract base class in the Fusion 360 API 
@@ -228,6 +731,7 @@ class WorkspaceActivatedHandler(adsk.core.WorkspaceEventHandler):
     def __init__(self):
         super().__init__()
     
+    @tracing.traced_handler
     def notify(self, args):
         """
         The method that is called when a Workspace Event happens
@@ -236,9 +740,16 @@ class WorkspaceActivatedHandler(adsk.core.WorkspaceEventHandler):
             args (adsk.core.WorkspaceEventArgs): Information about the workspace that 
                                                  was activated or deactivated
         """
-        # Update button based on current camera mode now that viewport is ready
+        # Only the Design workspace has the Inspect panel
+        if args.workspace.id != DESIGN_WORKSPACE_ID:
+            return
+
+        # Create the controls now that the viewport is ready, this is only
+        # needed once so the handler then disconnects itself
         try:
-            createButtons(adsk.core.Application.get())
+            if startControls():
+                _ui.workspaceActivated.remove(self)
+                _handlers.discard(self)
         except FusionNullObjectError as e:
             # SOLID tab or INSPECT panel Objects we expected to find did not exist
             if _ui:
@@ -252,6 +763,84 @@ class WorkspaceActivatedHandler(adsk.core.WorkspaceEventHandler):
             else:
                 print('Failed in WorkspaceActivatedHandler():\n{}'.format(traceback.format_exc()))
 
+class CameraChangedHandler(adsk.core.CameraEventHandler):
+    """
+    Handler that is called whenever a camera changes, which can be many
+    times a second while the user orbits or zooms
+
+    Args:
+        adsk (CameraEventHandler): Abstract base class in the Fusion 360 API 
+                                   that defines the interface for responding 
+                                   to Camera events
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        """
+        The method that is called when a Camera Event happens, it only queues
+        a check of the button so it must stay cheap
+
+        Args:
+            args (adsk.core.CameraEventArgs): Provides access to .viewport
+        """
+        try:
+            requestButtonSync()
+        except:
+            print('Failed in CameraChangedHandler():\n{}'.format(traceback.format_exc()))
+
+class DocumentActivatedHandler(adsk.core.DocumentEventHandler):
+    """
+    Handler that is called whenever a document is activated, since each
+    document has its own viewport and camera
+
+    Args:
+        adsk (DocumentEventHandler): Abstract base class in the Fusion 360 API 
+                                     that defines the interface for responding 
+                                     to Document events
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        """
+        The method that is called when a Document Event happens
+
+        Args:
+            args (adsk.core.DocumentEventArgs): Provides access to .document
+        """
+        try:
+            requestButtonSync()
+        except:
+            print('Failed in DocumentActivatedHandler():\n{}'.format(traceback.format_exc()))
+
+class SyncButtonHandler(adsk.core.CustomEventHandler):
+    """
+    Handler for the custom event that runs a queued button sync
+
+    Args:
+        adsk (CustomEventHandler): Abstract base class in the Fusion 360 API 
+                                   that defines the interface for responding 
+                                   to Custom events
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def notify(self, args):
+        """
+        The method that is called when the queued sync runs
+
+        Args:
+            args (adsk.core.CustomEventArgs): Information about the custom event
+        """
+        try:
+            syncButton()
+        except FusionNullObjectError as e:
+            # The SOLID tab or INSPECT panel is not there, e.g. in another workspace
+            print('Fusion Error:', e)
+        except:
+            print('Failed in SyncButtonHandler():\n{}'.format(traceback.format_exc()))
+
 class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
     """
     Handler that is called whenever to handle the CommandCreated event, which fires 
@@ -261,10 +850,14 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
         adsk (CommandCreatedEventHandler): Abstract base class in the Fusion 360 API 
                                            that defines the interface for responding 
                                            to Command creation events
+        animated (bool, optional): Whether the command animates the switch.
+                                   Defaults to False
     """
-    def __init__(self):
+    def __init__(self, animated=False):
         super().__init__()
+        self.animated = animated
     
+    @tracing.traced_handler
     def notify(self, args):
         """
         The method that is called when a Command Creation Event happens
@@ -276,9 +869,8 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
         # Create a new handler
         try:
             cmd = args.command
-            onExecute = CommandExecuteHandler()
-            cmd.execute.add(onExecute)
-            _handlers.append(onExecute)
+            onExecute = CommandExecuteHandler(self.animated)
+            _handlers.add_to_command(cmd, cmd.execute, onExecute)
         except:
             if _ui:
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -293,10 +885,14 @@ class CommandExecuteHandler(adsk.core.CommandEventHandler):
         adsk (CommandEventHandler): Abstract base class in the Fusion 360 API 
                                     that defines the interface for responding 
                                     to Command events
+        animated (bool, optional): Whether to animate the switch with a dolly zoom.
+                                   Defaults to False
     """
-    def __init__(self):
+    def __init__(self, animated=False):
         super().__init__()
+        self.animated = animated
     
+    @tracing.traced_handler
     def notify(self, args):
         """
         The method that is called when a Command Event happens
@@ -308,96 +904,92 @@ class CommandExecuteHandler(adsk.core.CommandEventHandler):
                                                (the new command object)
         """
         try:
+            # Finish any animation first, so its end state is what gets toggled
+            animation.complete()
+
             app = adsk.core.Application.get()
-            viewport = app.activeViewport
-            currentCamera = viewport.camera
+            with tracing.span('Application.activeViewport'):
+                viewport = app.activeViewport
+            with tracing.span('Viewport.camera'):
+                currentCamera = viewport.camera
             
             # CRITICAL: Always check current state before toggling
             # The user might have changed modes via Display Settings menu
             # Note: 'Perspective with Ortho Faces' will be treated as regular Perspective mode
-            currentType = currentCamera.cameraType
-            
-            # Save current view info
-            eye = currentCamera.eye
-            target = currentCamera.target
-            upVector = currentCamera.upVector
-            
-            # Toggle between perspective and orthographic based on CURRENT state
-            if currentType == adsk.core.CameraTypes.PerspectiveCameraType:
-                # Currently Perspective - Switching TO Orthographic
-                import math
-                
-                # Get viewport aspect ratio
-                viewportWidth = viewport.width
-                viewportHeight = viewport.height
-                aspectRatio = viewportWidth / viewportHeight if viewportHeight > 0 else 1.0
-                
-                # Calculate the vertical and horizontal sizes visible at the target distance
-                verticalSize =  2.0 * eye.distanceTo(target) * math.tan(currentCamera.perspectiveAngle / 2.0)
-                horizontalSize = verticalSize * aspectRatio
-                
-                # Change the current camera to an orthographic camera
-                currentCamera.cameraType = adsk.core.CameraTypes.OrthographicCameraType
-                currentCamera.isSmoothTransition = False
-                
-                # Assign the changed camera to the viewport
-                viewport.camera = currentCamera
-
-                # Get the new Camera and set it extents
-                attachedCamera = viewport.camera
-                attachedCamera.isSmoothTransition = False
-                attachedCamera.setExtents(horizontalSize, verticalSize)
-
-                # Assign the final camera to the viewport
-                viewport.camera = attachedCamera
+            if currentCamera.cameraType == adsk.core.CameraTypes.PerspectiveCameraType:
+                newCameraType = adsk.core.CameraTypes.OrthographicCameraType
+            else:
+                newCameraType = adsk.core.CameraTypes.PerspectiveCameraType
 
-                # Swap the buttons
-                swapButtons('CameraToggleOrtho', 'CameraTogglePersp')
-                
+            # Toggle between perspective and orthographic based on CURRENT state
+            if self.animated:
+                # The animation refreshes the viewport and updates the button
+                animateCamera(viewport, currentCamera, app.activeDocument.creationId, newCameraType)
             else:
-                # Currently Orthographic - Switching TO Perspective
-                import math
+                switchCamera(viewport, currentCamera, app.activeDocument.creationId, newCameraType)
+
+                # Update the button
+                updateButton(newCameraType)
                 
-                # Get the current vertical size from the current camera's extents
-                _, _, verticalSize = currentCamera.getExtents()
+                # Refresh the viewport to display the changed camera view
+                tracing.call('Viewport.refresh', viewport.refresh)
 
-                # Change the current camera to a perspective camera
-                currentCamera.cameraType = adsk.core.CameraTypes.PerspectiveCameraType
-                currentCamera.isSmoothTransition = False
-                currentCamera.isFitView = True
+        except:
+            if _ui:
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
-                # Assign the changed camera to the viewport
-                viewport.camera = currentCamera
+class SetAllCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
+    """
+    Handler for the CommandCreated event of the set all commands
 
-                # Calculate distance needed for this vertical size
-                desiredDistance = (verticalSize / 2.0) / math.tan(viewport.camera.perspectiveAngle / 2.0)
-                
-                # Calculate new eye position maintaining the same direction
-                direction = eye.asVector()
-                direction.subtract(target.asVector())
-                direction.normalize()
-                direction.scaleBy(desiredDistance)
+    Args:
+        cameraType (adsk.core.CameraTypes): The camera mode the command switches to
+    """
+    def __init__(self, cameraType):
+        super().__init__()
+        self.cameraType = cameraType
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        """
+        The method that is called when a Command Creation Event happens
 
-                # Create a new eye                
-                newEye = target.copy()
-                newEye.translateBy(direction)
+        Args:
+            args (adsk.core.CommandEventArgs): Provides access to .command 
+                                               (the new command object)
+        """
+        try:
+            cmd = args.command
+            onExecute = SetAllCommandExecuteHandler(self.cameraType)
+            _handlers.add_to_command(cmd, cmd.execute, onExecute)
+        except:
+            if _ui:
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+            else:
+                print('Failed:\n{}'.format(traceback.format_exc()))
 
-                # Get the new Camera and set it's new eye
-                attachedCamera = viewport.camera
-                attachedCamera.eye = newEye
-                attachedCamera.target = target
-                attachedCamera.upVector = upVector
-                attachedCamera.isSmoothTransition = False
+class SetAllCommandExecuteHandler(adsk.core.CommandEventHandler):
+    """
+    Handler that switches every open document to one camera mode
 
-                # Assign the final camera to the viewport
-                viewport.camera = attachedCamera
-                
-                # Swap the buttons
-                swapButtons('CameraTogglePersp', 'CameraToggleOrtho')
-            
-            # Refresh the viewport to display the changed camera view
-            viewport.refresh()
+    Args:
+        cameraType (adsk.core.CameraTypes): The camera mode to switch to
+    """
+    def __init__(self, cameraType):
+        super().__init__()
+        self.cameraType = cameraType
+    
+    @tracing.traced_handler
+    def notify(self, args):
+        """
+        The method that is called when a Command Event happens
 
+        Args:
+            args (adsk.core.CommandEventArgs): Provides access to .command 
+                                               (the new command object)
+        """
+        try:
+            setAllCameras(self.cameraType)
         except:
             if _ui:
-                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
\ No newline at end of file
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -0,0 +1,190 @@
+"""
+Frame-paced camera animations that never hold up Fusion's UI.
+
+A timer thread fires a custom event at the target frame rate and each event
+draws one frame on the main thread. Progress follows the clock rather than
+the frame count, so a late frame skips ahead instead of slowing the
+animation down. While a frame is still waiting to be drawn, further ticks
+are dropped rather than queued, so a busy UI never works through a backlog.
+
+The time spent drawing each frame is recorded and summarised in Fusion's
+text command window when the animation ends, so it can be checked against
+the frame budget.
+"""
+
+import adsk.core
+import threading
+import time
+import traceback
+
+from . import tracing
+
+CUSTOM_EVENT_ID = 'EmbergleamToggleCameraFrame'
+
+# Target frames per second and length of an animation in seconds
+DEFAULT_FPS = 60
+DEFAULT_DURATION = 0.4
+
+# The animation currently running, if any; only one runs at a time
+_active_animation = None
+
+
+class FrameEventHandler(adsk.core.CustomEventHandler):
+    """
+    Draws the next frame of the active animation each time the custom event fires.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        if _active_animation:
+            tracing.resume(_active_animation.trace, 'Animation.run_frame', _active_animation.run_frame)
+
+
+class Animation:
+    """
+    Calls draw(fraction) once per frame as fraction goes from 0 to 1 over
+    duration seconds, then on_done().
+
+    Args:
+        draw (callable): Draws the frame for a fraction between 0 and 1
+        on_done (callable): Called with no arguments to draw the end state
+        duration (float, optional): Seconds the animation lasts
+        fps (int, optional): Target frames per second
+    """
+    def __init__(self, draw, on_done, duration=DEFAULT_DURATION, fps=DEFAULT_FPS):
+        self.draw = draw
+        self.on_done = on_done
+        self.duration = duration
+        self.frame_budget = 1.0 / fps
+        # Seconds spent drawing each frame
+        self.frame_times = []
+        self.dropped_frames = 0
+        self.start_time = None
+        self.custom_event = None
+        self.handler = None
+        self.trace = None
+        self._frame_pending = False
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Draw the first frame straight away and start the frame timer. A
+        running animation is first jumped to its end.
+        """
+        global _active_animation
+        complete()
+
+        app = adsk.core.Application.get()
+        _active_animation = self
+        self.trace = tracing.hold()
+        self.custom_event = app.registerCustomEvent(CUSTOM_EVENT_ID)
+        self.handler = FrameEventHandler()
+        self.custom_event.add(self.handler)
+
+        self.start_time = time.perf_counter()
+        self._draw_frame(0.0)
+
+        self._thread = threading.Thread(target=self._tick, daemon=True)
+        self._thread.start()
+
+    def _tick(self):
+        """
+        Frame timer, run on its own thread; only fires the custom event.
+        """
+        app = adsk.core.Application.get()
+        while not self._stopping.wait(self.frame_budget):
+            if self._frame_pending:
+                self.dropped_frames += 1
+                continue
+            self._frame_pending = True
+            app.fireCustomEvent(CUSTOM_EVENT_ID)
+
+    def run_frame(self):
+        """
+        Draw the frame for the current time, or the end state once the
+        duration has passed.
+        """
+        self._frame_pending = False
+        if self.custom_event is None:
+            # Finished while this frame was queued
+            return
+        try:
+            fraction = (time.perf_counter() - self.start_time) / self.duration
+            if fraction >= 1.0:
+                self.complete()
+            else:
+                self._draw_frame(fraction)
+
+        except:
+            self._finish()
+            app = adsk.core.Application.get()
+            app.userInterface.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+    def _draw_frame(self, fraction):
+        frame_start = time.perf_counter()
+        with tracing.span('Animation.draw'):
+            self.draw(fraction)
+        self.frame_times.append(time.perf_counter() - frame_start)
+
+    def complete(self):
+        """
+        Stop the animation and draw its end state.
+        """
+        if self._finish():
+            self.on_done()
+
+    def _finish(self):
+        """
+        Stop the frame timer, release the custom event and log the frame timing.
+
+        Returns:
+            bool: False if the animation had already finished
+        """
+        global _active_animation
+        if self.custom_event is None:
+            return False
+        app = adsk.core.Application.get()
+        self._stopping.set()
+        self.custom_event.remove(self.handler)
+        app.unregisterCustomEvent(CUSTOM_EVENT_ID)
+        self.custom_event = None
+        tracing.release(self.trace)
+        self.trace = None
+        if _active_animation is self:
+            _active_animation = None
+        app.log(self.summary())
+        return True
+
+    def summary(self):
+        """
+        Return a one line report of the frames drawn and their timing.
+        """
+        longest = max(self.frame_times) if self.frame_times else 0.0
+        return 'Camera animation: {} frames in {:.2f} s, {} dropped, longest frame {:.1f} ms of a {:.1f} ms budget'.format(
+            len(self.frame_times), time.perf_counter() - self.start_time, self.dropped_frames,
+            longest * 1000.0, self.frame_budget * 1000.0)
+
+
+def is_running():
+    """
+    Return True if an animation is in progress.
+    """
+    return _active_animation is not None
+
+
+def complete():
+    """
+    Jump the running animation, if any, to its end state.
+    """
+    if _active_animation:
+        _active_animation.complete()
+
+
+def cancel():
+    """
+    Stop the running animation, if any, without drawing its end state.
+    """
+    if _active_animation:
+        _active_animation._finish()
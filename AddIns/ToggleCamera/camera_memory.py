@@ -0,0 +1,91 @@
+"""
+Memory of the last toggle made in each document, so toggling back before the
+view has moved restores the exact camera that was left instead of
+recalculating it.
+
+Only the most recently toggled documents are remembered. Like projection.py
+this module works on plain tuples and has no Fusion dependency.
+"""
+
+import collections
+import math
+
+# Number of documents whose last toggle is remembered
+MAX_DOCUMENTS = 20
+
+# Points, vectors and sizes closer than this count as the same view
+TOLERANCE = 1e-6
+
+PerspectiveView = collections.namedtuple(
+    'PerspectiveView', ('eye', 'target', 'up_vector', 'perspective_angle'))
+OrthographicView = collections.namedtuple(
+    'OrthographicView', ('eye', 'target', 'up_vector', 'extents'))
+
+# Document key -> (PerspectiveView, OrthographicView) of the last toggle,
+# least recently used first
+_toggles = collections.OrderedDict()
+
+
+def remember(key, perspective, orthographic):
+    """
+    Record the two views either side of a toggle in a document.
+
+    Args:
+        key (str): The document's key, e.g. its creation id
+        perspective (PerspectiveView): The perspective side of the toggle
+        orthographic (OrthographicView): The orthographic side of the toggle
+    """
+    _toggles[key] = (perspective, orthographic)
+    _toggles.move_to_end(key)
+    while len(_toggles) > MAX_DOCUMENTS:
+        _toggles.popitem(last=False)
+
+
+def recall(key, current):
+    """
+    Return the view on the other side of the last toggle in a document, if
+    the current view is still the one that toggle left.
+
+    Args:
+        key (str): The document's key
+        current (PerspectiveView or OrthographicView): The view now shown
+    Returns:
+        OrthographicView or PerspectiveView: The view to restore, or None if
+        there is none or the view has moved since
+    """
+    toggle = _toggles.get(key)
+    if toggle is None:
+        return None
+    _toggles.move_to_end(key)
+    perspective, orthographic = toggle
+    if isinstance(current, PerspectiveView):
+        return orthographic if same_view(current, perspective) else None
+    return perspective if same_view(current, orthographic) else None
+
+
+def forget(key):
+    """
+    Drop what is remembered for a document.
+    """
+    _toggles.pop(key, None)
+
+
+def clear():
+    """
+    Drop everything, used when the Add-In stops.
+    """
+    _toggles.clear()
+
+
+def same_view(first, second):
+    """
+    Return True if two views of the same kind match within TOLERANCE.
+    """
+    return all(_close(a, b) for a, b in zip(first, second))
+
+
+def _close(first, second):
+    if isinstance(first, (int, float)):
+        return math.isclose(first, second, rel_tol=TOLERANCE, abs_tol=TOLERANCE)
+    return all(math.isclose(a, b, rel_tol=TOLERANCE, abs_tol=TOLERANCE)
+               for a, b in zip(first, second))
@@ -0,0 +1,107 @@
+"""
+Keeps event handlers referenced for exactly as long as they are needed.
+
+Fusion only holds weak references to Python event handlers, so an add-in has
+to keep its own. Handlers for the whole session (command created, application
+events) are kept until the add-in stops. Handlers connected to a running
+command are released when that command is destroyed, so clicking a command
+thousands of times does not grow the list.
+"""
+
+import adsk.core
+
+
+class CommandDestroyHandler(adsk.core.CommandEventHandler):
+    """
+    Releases the handlers of a command once Fusion destroys it.
+    """
+    def __init__(self, registry, cmd_id, command):
+        super().__init__()
+        self.registry = registry
+        self.cmd_id = cmd_id
+        self.command = command
+
+    def notify(self, args):
+        self.registry.release_command(self.cmd_id, self.command)
+
+
+class HandlerRegistry:
+    """
+    The event handlers of one add-in.
+
+    Iterating over the registry gives the session handlers, e.g. to
+    disconnect application events in stop().
+    """
+    def __init__(self):
+        self._session_handlers = []
+        # Command definition id -> (command, [handlers]) while the command runs
+        self._command_handlers = {}
+
+    def keep(self, handler):
+        """
+        Keep a handler until the add-in stops.
+        """
+        self._session_handlers.append(handler)
+        return handler
+
+    def discard(self, handler):
+        """
+        Stop keeping a session handler that is no longer connected.
+        """
+        if handler in self._session_handlers:
+            self._session_handlers.remove(handler)
+
+    def add_to_command(self, command, event, handler):
+        """
+        Connect handler to one of a running command's events and keep it
+        until the command is destroyed.
+
+        Fusion runs one command per definition at a time, so the handlers are
+        grouped by command definition id. A new command for the same
+        definition replaces any handlers left over from the previous one.
+
+        Args:
+            command (adsk.core.Command): The command from the commandCreated event
+            event (adsk.core.Event): One of command's events, e.g. command.execute
+            handler (adsk.core.EventHandler): The handler to connect
+        """
+        cmd_id = command.parentCommandDefinition.id
+        entry = self._command_handlers.get(cmd_id)
+        if entry is None or entry[0] is not command:
+            on_destroy = CommandDestroyHandler(self, cmd_id, command)
+            command.destroy.add(on_destroy)
+            entry = (command, [on_destroy])
+            self._command_handlers[cmd_id] = entry
+        event.add(handler)
+        entry[1].append(handler)
+        return handler
+
+    def release_command(self, cmd_id, command):
+        """
+        Drop the handlers kept for a command that has finished. A destroy
+        event that arrives after the next command of the same definition was
+        created leaves that command's handlers alone.
+        """
+        entry = self._command_handlers.get(cmd_id)
+        if entry is not None and entry[0] is command:
+            del self._command_handlers[cmd_id]
+
+    def count(self):
+        """
+        Return the number of handlers being kept.
+        """
+        return len(self._session_handlers) + \
+            sum(len(handlers) for _, handlers in self._command_handlers.values())
+
+    def clear(self):
+        """
+        Drop every handler, used when the add-in stops.
+        """
+        self._session_handlers.clear()
+        self._command_handlers.clear()
+
+    def __iter__(self):
+        return iter(list(self._session_handlers))
+
+    def __len__(self):
+        return self.count()
@@ -0,0 +1,153 @@
+"""
+Perspective <-> orthographic camera conversion math.
+
+Works on plain (x, y, z) tuples or lists and has no Fusion dependency, so it
+can be used and tested outside Fusion. The batch functions convert many
+cameras (e.g. named views or saved viewpoints) in one call. When they are
+given NumPy arrays, they work on whole arrays at once and return arrays. Other
+sequences are converted one camera at a time without needing NumPy, which
+Fusion's bundled Python does not include.
+
+Perspective angles are full vertical fields of view in radians, as in
+adsk.core.Camera.perspectiveAngle.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def orthographic_extents(eye, target, perspective_angle, aspect_ratio):
+    """
+    Return the (width, height) an orthographic camera needs to show what a
+    perspective camera shows at its target distance.
+
+    Args:
+        eye (tuple): The perspective camera's eye point
+        target (tuple): The perspective camera's target point
+        perspective_angle (float): The perspective camera's field of view
+        aspect_ratio (float): Viewport width / height
+    """
+    height = 2.0 * math.dist(eye, target) * math.tan(perspective_angle / 2.0)
+    return height * aspect_ratio, height
+
+
+def perspective_eye(eye, target, vertical_size, perspective_angle):
+    """
+    Return the eye point, on the line from target through eye, at which a
+    perspective camera shows vertical_size at the target.
+
+    Args:
+        eye (tuple): The current eye point, giving the view direction
+        target (tuple): The target point
+        vertical_size (float): Height visible in the orthographic view
+        perspective_angle (float): The perspective camera's field of view
+    """
+    distance = (vertical_size / 2.0) / math.tan(perspective_angle / 2.0)
+    direction = [e - t for e, t in zip(eye, target)]
+    length = math.sqrt(sum(d * d for d in direction))
+    if length == 0.0:
+        # No view direction to move along
+        return tuple(target)
+    scale = distance / length
+    return tuple(t + d * scale for t, d in zip(target, direction))
+
+
+def dolly_zoom(eye, target, vertical_size, start_angle, end_angle, fraction):
+    """
+    Return the (eye, perspective angle) part way through a dolly zoom, which
+    changes the field of view while moving the eye so that vertical_size
+    stays visible at the target.
+
+    The half angle's tangent is interpolated geometrically with ease in and
+    out, so the eye distance changes at an even rate however far it moves.
+
+    Args:
+        eye (tuple): The eye point, giving the view direction
+        target (tuple): The target point
+        vertical_size (float): Height kept visible at the target
+        start_angle (float): Field of view at fraction 0
+        end_angle (float): Field of view at fraction 1
+        fraction (float): How far through the zoom, from 0 to 1
+    """
+    eased = fraction * fraction * (3.0 - 2.0 * fraction)
+    start_tan = math.tan(start_angle / 2.0)
+    end_tan = math.tan(end_angle / 2.0)
+    angle = 2.0 * math.atan(start_tan * (end_tan / start_tan) ** eased)
+    return perspective_eye(eye, target, vertical_size, angle), angle
+
+
+def orthographic_extents_batch(eyes, targets, perspective_angles, aspect_ratios):
+    """
+    orthographic_extents() for many cameras at once.
+
+    Args:
+        eyes: N eye points
+        targets: N target points
+        perspective_angles: N fields of view, or one for all cameras
+        aspect_ratios: N aspect ratios, or one for all cameras
+    Returns:
+        An N x 2 array of (width, height) for NumPy input, otherwise a list
+        of (width, height) tuples
+    """
+    if _is_array(eyes, targets, perspective_angles, aspect_ratios):
+        eyes = np.asarray(eyes, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        heights = 2.0 * np.linalg.norm(eyes - targets, axis=-1) * \
+            np.tan(np.asarray(perspective_angles, dtype=float) / 2.0)
+        widths = heights * np.asarray(aspect_ratios, dtype=float)
+        return np.stack(np.broadcast_arrays(widths, heights), axis=-1)
+
+    count = len(eyes)
+    return [orthographic_extents(eye, target, angle, aspect_ratio)
+            for eye, target, angle, aspect_ratio in zip(
+                eyes, targets, _per_camera(perspective_angles, count),
+                _per_camera(aspect_ratios, count))]
+
+
+def perspective_eyes_batch(eyes, targets, vertical_sizes, perspective_angles):
+    """
+    perspective_eye() for many cameras at once.
+
+    Args:
+        eyes: N eye points
+        targets: N target points
+        vertical_sizes: N visible heights, or one for all cameras
+        perspective_angles: N fields of view, or one for all cameras
+    Returns:
+        An N x 3 array of eye points for NumPy input, otherwise a list of
+        (x, y, z) tuples
+    """
+    if _is_array(eyes, targets, vertical_sizes, perspective_angles):
+        eyes = np.asarray(eyes, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        distances = (np.asarray(vertical_sizes, dtype=float) / 2.0) / \
+            np.tan(np.asarray(perspective_angles, dtype=float) / 2.0)
+        directions = eyes - targets
+        lengths = np.linalg.norm(directions, axis=-1)
+        # Cameras with no view direction keep their eye on the target
+        scales = np.divide(distances, lengths, out=np.zeros(np.broadcast(distances, lengths).shape),
+                           where=lengths != 0.0)
+        return targets + directions * scales[..., np.newaxis]
+
+    count = len(eyes)
+    return [perspective_eye(eye, target, vertical_size, angle)
+            for eye, target, vertical_size, angle in zip(
+                eyes, targets, _per_camera(vertical_sizes, count),
+                _per_camera(perspective_angles, count))]
+
+
+def _is_array(*values):
+    return np is not None and any(isinstance(value, np.ndarray) for value in values)
+
+
+def _per_camera(value, count):
+    """
+    Return value as one entry per camera, repeating a single number.
+    """
+    if isinstance(value, (int, float)):
+        return [value] * count
+    return value
@@ -0,0 +1,232 @@
+"""
+Opt-in tracing of add-in event handlers and the Fusion API calls they make.
+
+Tracing is off unless the FUSION_ADDIN_TRACE environment variable is set or a
+file called trace.enabled exists in the add-in folder. While it is off,
+traced handlers call straight through, span() returns a shared no-op context
+manager and traced_iter() returns the iterable it was given, so the cost is a
+flag check per call.
+
+While it is on, each handler invocation records the count and cumulative
+time of every span and writes a Chrome trace (open in chrome://tracing or
+https://ui.perfetto.dev) to the traces folder in the system temp directory.
+"""
+
+import functools
+import json
+import os
+import tempfile
+import time
+
+ADDIN_PATH = os.path.dirname(os.path.realpath(__file__))
+ADDIN_NAME = os.path.basename(ADDIN_PATH)
+
+enabled = bool(os.environ.get('FUSION_ADDIN_TRACE')) or \
+    os.path.exists(os.path.join(ADDIN_PATH, 'trace.enabled'))
+
+# Individual events kept per trace; spans beyond this are only counted
+MAX_EVENTS = 20000
+
+# The trace being recorded, if any
+_current = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """
+    The spans recorded during one handler invocation.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.events = []
+        self.summary = {}
+        self.dropped = 0
+        self.holds = 0
+        self.active = 0
+
+    def record(self, name, start, end):
+        count, total = self.summary.get(name, (0, 0.0))
+        self.summary[name] = (count + 1, total + (end - start))
+        if len(self.events) < MAX_EVENTS:
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': 1,
+                'tid': 1,
+            })
+        else:
+            self.dropped += 1
+
+    def write(self):
+        """
+        Write the trace as Chrome trace JSON and return the file path.
+        """
+        trace_dir = os.path.join(tempfile.gettempdir(), 'FusionAddInTraces', ADDIN_NAME)
+        os.makedirs(trace_dir, exist_ok=True)
+        file_name = '{}-{}-{:03d}.json'.format(self.name.replace('.', '_'),
+                                               time.strftime('%Y%m%d-%H%M%S'),
+                                               int(time.time() * 1000) % 1000)
+        path = os.path.join(trace_dir, file_name)
+        summary = {name: {'count': count, 'total_ms': total * 1000.0}
+                   for name, (count, total) in sorted(self.summary.items(),
+                                                      key=lambda item: -item[1][1])}
+        with open(path, 'w') as trace_file:
+            json.dump({
+                'traceEvents': self.events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'handler': self.name, 'summary': summary,
+                              'droppedEvents': self.dropped},
+            }, trace_file)
+        return path
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+def span(name):
+    """
+    Context manager timing the enclosed block as name in the current trace.
+    """
+    if _current is None:
+        return NULL_SPAN
+    return _Span(_current, name)
+
+
+def call(name, function, *args):
+    """
+    Call function(*args), timing it as name in the current trace.
+    """
+    if _current is None:
+        return function(*args)
+    start = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        _current.record(name, start, time.perf_counter())
+
+
+def traced_iter(iterable, name):
+    """
+    Iterate over an API collection, timing each item fetch as name.
+    """
+    if _current is None:
+        return iterable
+    return _traced_iter(_current, iter(iterable), name)
+
+
+def _traced_iter(trace, iterator, name):
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        trace.record(name, start, time.perf_counter())
+        yield item
+
+
+def traced_handler(notify):
+    """
+    Decorator for a handler's notify() method that records a trace of the
+    invocation when tracing is enabled.
+    """
+    @functools.wraps(notify)
+    def wrapper(self, args):
+        if not enabled:
+            return notify(self, args)
+        return _run_traced(type(self).__name__ + '.notify', notify, self, args)
+    return wrapper
+
+
+def _run_traced(name, function, *args):
+    global _current
+    if _current is not None:
+        # Nested handler, e.g. one command executing another
+        with _Span(_current, name):
+            return function(*args)
+
+    trace = Trace(name)
+    _current = trace
+    trace.active += 1
+    try:
+        with _Span(trace, name):
+            return function(*args)
+    finally:
+        _current = None
+        trace.active -= 1
+        if not trace.holds:
+            _write(trace)
+
+
+def hold():
+    """
+    Keep the current trace open after its handler returns, for work that
+    continues in later events. Returns the trace to pass to resume() and
+    release(), or None when nothing is being traced.
+    """
+    if _current is not None:
+        _current.holds += 1
+    return _current
+
+
+def resume(trace, name, function, *args):
+    """
+    Call function(*args) as part of a held trace.
+    """
+    global _current
+    if trace is None or _current is not None:
+        return function(*args)
+    _current = trace
+    trace.active += 1
+    try:
+        with _Span(trace, name):
+            return function(*args)
+    finally:
+        _current = None
+        trace.active -= 1
+        if not trace.holds:
+            _write(trace)
+
+
+def release(trace):
+    """
+    Drop a hold on a trace, writing it once nothing holds it open.
+    """
+    if trace is None:
+        return
+    trace.holds -= 1
+    if not trace.holds and not trace.active:
+        _write(trace)
+
+
+def _write(trace):
+    try:
+        trace.write()
+    except OSError as e:
+        print('Failed to write trace:', e)
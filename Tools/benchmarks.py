@@ -0,0 +1,179 @@
+"""
+Benchmarks for the add-ins in this repository, run outside Fusion against the
+fake adsk API in Tools/fake_adsk.
+
+Reports wall time and the number of API calls (each one a round trip in the
+real API) for body search, selection set update and camera toggle:
+
+    python Tools/benchmarks.py
+    python Tools/benchmarks.py --sizes 100 1000 10000 100000 --reuse 50
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+TOOLS_PATH = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(TOOLS_PATH, 'fake_adsk'))
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLS_PATH), 'AddIns'))
+
+import adsk
+import adsk.core
+import adsk.fusion
+import synthetic
+
+DEFAULT_SIZES = (100, 1000, 10000)
+SEARCH_NAME = 'Bolt M6'
+
+
+def load_addin(module_name):
+    """
+    Import an add-in module afresh so no state is shared between benchmarks.
+    """
+    package = module_name.split('.')[0]
+    for name in list(sys.modules):
+        if name == package or name.startswith(package + '.'):
+            del sys.modules[name]
+    return importlib.import_module(module_name)
+
+
+def new_session(occurrences, reuse):
+    """
+    Start a fresh fake application with a synthetic design open.
+    """
+    adsk.core.Application._reset()
+    design = synthetic.build_design(occurrences, instances_per_component=reuse)
+    synthetic.open_design(design)
+    return adsk.core.Application._get(), design
+
+
+def measure(function):
+    """
+    Run function once and return (result, wall time in ms, API calls).
+    """
+    adsk.reset_api_calls()
+    start_time = time.perf_counter()
+    result = function()
+    elapsed = (time.perf_counter() - start_time) * 1000.0
+    return result, elapsed, adsk.total_api_calls()
+
+
+def legacy_search(design, body_name):
+    """
+    The original Find Bodies walk: every body of every occurrence, every time.
+    """
+    root_comp = design.rootComponent
+    matching_bodies = [body for body in root_comp.bRepBodies if body.name == body_name]
+    for occ in root_comp.allOccurrences:
+        if occ.component:
+            for body in occ.component.bRepBodies:
+                if body.name == body_name:
+                    matching_bodies.append(body.createForAssemblyContext(occ))
+    return matching_bodies
+
+
+def run_command(app, cmd_id, inputs=None):
+    """
+    Execute a command definition and let any sliced work run to completion.
+    """
+    cmd_def = app.userInterface.commandDefinitions.itemById(cmd_id)
+    if inputs:
+        cmd_def._set_next_inputs(inputs)
+    cmd_def.execute()
+    app._process_events()
+
+
+def bench_body_search(occurrences, reuse):
+    rows = []
+    app, design = new_session(occurrences, reuse)
+    addin = load_addin('SelectionSets.CreateSelectionSet')
+    addin.run({})
+
+    _, elapsed, calls = measure(lambda: legacy_search(design, SEARCH_NAME))
+    rows.append(('search (full walk)', elapsed, calls))
+
+    # Scoped to the first subassembly, before any index of the whole design exists
+    first_group = design.rootComponent.occurrences.item(0)
+    scoped = lambda: run_command(app, 'FindBodiesCreateSelectionSet',
+                                 {'bodyName': SEARCH_NAME, 'scope': [first_group]})
+    _, elapsed, calls = measure(scoped)
+    rows.append(('search (one subassembly)', elapsed, calls))
+
+    search = lambda: run_command(app, 'FindBodiesCreateSelectionSet', {'bodyName': SEARCH_NAME})
+    _, elapsed, calls = measure(search)
+    rows.append(('search (cold index)', elapsed, calls))
+    _, elapsed, calls = measure(search)
+    rows.append(('search (warm index)', elapsed, calls))
+
+    addin.stop({})
+    return rows
+
+
+def bench_selection_set_update(occurrences, reuse):
+    rows = []
+    app, design = new_session(occurrences, reuse)
+    addin = load_addin('SelectionSets.CreateSelectionSet')
+    bodies = legacy_search(design, SEARCH_NAME)
+    set_name = addin.make_plural(SEARCH_NAME)
+
+    _, elapsed, calls = measure(lambda: addin.update_selection_set(design, set_name, bodies))
+    rows.append((f'set create ({len(bodies)})', elapsed, calls))
+    _, elapsed, calls = measure(lambda: addin.update_selection_set(design, set_name, bodies))
+    rows.append(('set update (unchanged)', elapsed, calls))
+
+    changed = bodies[len(bodies) // 10:]
+    _, elapsed, calls = measure(lambda: addin.update_selection_set(design, set_name, changed))
+    rows.append(('set update (10% removed)', elapsed, calls))
+    return rows
+
+
+def bench_camera_toggle(toggles=20):
+    app, design = new_session(10, 1)
+    addin = load_addin('ToggleCamera.ToggleCamera')
+    addin.run({})
+    controls = app.userInterface.allToolbarTabs.itemById('SolidTab') \
+        .toolbarPanels.itemById('InspectPanel').controls
+
+    def toggle():
+        for _ in range(toggles):
+            run_command(app, 'CameraToggle')
+
+    layouts = controls._layouts
+    kept = addin._handlers.count()
+    _, elapsed, calls = measure(toggle)
+    layouts = controls._layouts - layouts
+    kept = addin._handlers.count() - kept
+
+    addin.stop({})
+    return [('camera toggle (per toggle)', elapsed / toggles, calls / toggles),
+            ('  toolbar layouts (per toggle)', None, layouts / toggles),
+            (f'  handlers kept (after {toggles})', None, kept)]
+
+
+def print_rows(title, rows):
+    print(title)
+    for name, elapsed, calls in rows:
+        elapsed_text = f'{elapsed:10.2f} ms' if elapsed is not None else ' ' * 13
+        print(f'  {name:<32}{elapsed_text}{calls:12.0f} calls')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='occurrence counts of the synthetic designs')
+    parser.add_argument('--reuse', type=int, default=10,
+                        help='average instances of each part component')
+    args = parser.parse_args()
+
+    for occurrences in args.sizes:
+        print_rows(f'Body search, {occurrences} occurrences, {args.reuse} instances/part',
+                   bench_body_search(occurrences, args.reuse))
+        print_rows(f'Selection set update, {occurrences} occurrences',
+                   bench_selection_set_update(occurrences, args.reuse))
+    print_rows('Camera toggle', bench_camera_toggle())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+In-process stand-in for the parts of the Fusion 360 API used by the add-ins
+in this repository, so they can be run and timed outside Fusion.
+
+Every property read, property write and method call made on a fake API object
+is counted in api_calls, keyed by 'ClassName.member', as an estimate of the
+number of round trips the add-in would make to the real API.
+"""
+
+import collections
+
+# 'ClassName.member' -> number of calls
+api_calls = collections.Counter()
+
+
+def reset_api_calls():
+    """
+    Clear the API call counters.
+    """
+    api_calls.clear()
+
+
+def total_api_calls():
+    """
+    Return the total number of API calls counted since the last reset.
+    """
+    return sum(api_calls.values())
+
+
+def autoTerminate(value):
+    """
+    Matches adsk.autoTerminate(); has no effect outside Fusion.
+    """
+    pass
@@ -0,0 +1,1120 @@
+"""
+Fake adsk.core: application, user interface, events, geometry and camera.
+
+Only the members the add-ins use are provided. Members starting with an
+underscore are harness helpers that do not exist in the real API and are not
+counted as API calls.
+"""
+
+import math
+
+import adsk
+
+
+class ApiObject:
+    """
+    Base class for fake API objects; counts every public member access.
+    """
+    def __getattribute__(self, name):
+        if not name.startswith('_'):
+            adsk.api_calls[type(self).__name__ + '.' + name] += 1
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            adsk.api_calls[type(self).__name__ + '.' + name + '='] += 1
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @property
+    def isValid(self):
+        return not getattr(self, '_deleted', False)
+
+    @property
+    def objectType(self):
+        return type(self).__module__ + '::' + type(self).__name__
+
+
+class ApiCollection(ApiObject):
+    """
+    Base class for fake API collections. Iterating fetches (and counts) one
+    item at a time, like the real collections do.
+    """
+    def __init__(self, items=None):
+        self._items = list(items) if items is not None else []
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    def __len__(self):
+        adsk.api_calls[type(self).__name__ + '.count'] += 1
+        return len(self._items)
+
+    def __getitem__(self, index):
+        adsk.api_calls[type(self).__name__ + '.item'] += 1
+        return self._items[index]
+
+    def __iter__(self):
+        name = type(self).__name__ + '.item'
+        for item in list(self._items):
+            adsk.api_calls[name] += 1
+            yield item
+
+    def itemById(self, item_id):
+        for item in self._items:
+            if getattr(item, '_id', None) == item_id:
+                return item
+        return None
+
+
+# Enumerations
+
+class CameraTypes:
+    OrthographicCameraType = 0
+    PerspectiveCameraType = 1
+    PerspectiveWithOrthoFacesCameraType = 2
+
+
+class CommandTerminationReason:
+    UnknownTerminationReason = 0
+    CompletedTerminationReason = 1
+    CancelledTerminationReason = 2
+    AbortedTerminationReason = 3
+    PreEmptedTerminationReason = 4
+    SessionEndingTerminationReason = 5
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class DialogResults:
+    DialogError = -1
+    DialogOK = 0
+    DialogCancel = 1
+    DialogYes = 2
+    DialogNo = 3
+
+
+class MessageBoxButtonTypes:
+    OKButtonType = 0
+    OKCancelButtonType = 1
+    RetryCancelButtonType = 2
+    YesNoButtonType = 3
+    YesNoCancelButtonType = 4
+
+
+class MessageBoxIconTypes:
+    NoIconIconType = 0
+    QuestionIconType = 1
+    InformationIconType = 2
+    WarningIconType = 3
+    CriticalIconType = 4
+
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+# Events
+
+class Event(ApiObject):
+    """
+    A fake API event; handlers are notified synchronously by _fire().
+    """
+    def __init__(self):
+        self._handlers = []
+
+    def add(self, handler):
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class EventArgs(ApiObject):
+    def __init__(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+
+class EventHandler:
+    """
+    Base for handler classes the add-ins subclass; not an API object itself.
+    """
+    def __init__(self):
+        pass
+
+    def notify(self, args):
+        pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class ApplicationCommandEventHandler(EventHandler):
+    pass
+
+
+class DocumentEventHandler(EventHandler):
+    pass
+
+
+class WorkspaceEventHandler(EventHandler):
+    pass
+
+
+class CameraEventHandler(EventHandler):
+    pass
+
+
+class CustomEventHandler(EventHandler):
+    pass
+
+
+class ValidateInputsEventHandler(EventHandler):
+    pass
+
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+
+# Geometry
+
+class Vector3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._xyz = [x, y, z]
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+    x = property(lambda self: self._xyz[0])
+    y = property(lambda self: self._xyz[1])
+    z = property(lambda self: self._xyz[2])
+
+    @property
+    def length(self):
+        return math.sqrt(sum(c * c for c in self._xyz))
+
+    def asArray(self):
+        return list(self._xyz)
+
+    def add(self, other):
+        self._xyz = [a + b for a, b in zip(self._xyz, other._xyz)]
+        return True
+
+    def subtract(self, other):
+        self._xyz = [a - b for a, b in zip(self._xyz, other._xyz)]
+        return True
+
+    def normalize(self):
+        length = math.sqrt(sum(c * c for c in self._xyz))
+        if length == 0:
+            return False
+        self._xyz = [c / length for c in self._xyz]
+        return True
+
+    def scaleBy(self, scale):
+        self._xyz = [c * scale for c in self._xyz]
+        return True
+
+    def copy(self):
+        return Vector3D(*self._xyz)
+
+
+class Point3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._xyz = [x, y, z]
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    x = property(lambda self: self._xyz[0])
+    y = property(lambda self: self._xyz[1])
+    z = property(lambda self: self._xyz[2])
+
+    def asArray(self):
+        return list(self._xyz)
+
+    def asVector(self):
+        return Vector3D(*self._xyz)
+
+    def distanceTo(self, other):
+        return math.sqrt(sum((a - b) ** 2 for a, b in zip(self._xyz, other._xyz)))
+
+    def translateBy(self, vector):
+        self._xyz = [a + b for a, b in zip(self._xyz, vector._xyz)]
+        return True
+
+    def copy(self):
+        return Point3D(*self._xyz)
+
+    def isEqualTo(self, other):
+        return self._xyz == other._xyz
+
+
+# Camera and viewport
+
+class Camera(ApiObject):
+    def __init__(self):
+        self._cameraType = CameraTypes.PerspectiveCameraType
+        self._eye = Point3D(0.0, -50.0, 30.0)
+        self._target = Point3D(0.0, 0.0, 0.0)
+        self._upVector = Vector3D(0.0, 0.0, 1.0)
+        self._perspectiveAngle = math.radians(30.0)
+        self._extents = (40.0, 30.0)
+        self._isSmoothTransition = True
+        self._isFitView = False
+        self._aspectRatio = 4.0 / 3.0
+
+    def _copy(self):
+        camera = Camera()
+        camera._cameraType = self._cameraType
+        camera._eye = Point3D(*self._eye._xyz)
+        camera._target = Point3D(*self._target._xyz)
+        camera._upVector = Vector3D(*self._upVector._xyz)
+        camera._perspectiveAngle = self._perspectiveAngle
+        camera._extents = self._extents
+        camera._isSmoothTransition = self._isSmoothTransition
+        camera._isFitView = self._isFitView
+        camera._aspectRatio = self._aspectRatio
+        return camera
+
+    def _field(name):
+        return property(lambda self: getattr(self, '_' + name),
+                        lambda self, value: object.__setattr__(self, '_' + name, value))
+
+    cameraType = _field('cameraType')
+    perspectiveAngle = _field('perspectiveAngle')
+    isSmoothTransition = _field('isSmoothTransition')
+    isFitView = _field('isFitView')
+
+    eye = property(lambda self: Point3D(*self._eye._xyz),
+                   lambda self, value: object.__setattr__(self, '_eye', Point3D(*value._xyz)))
+    target = property(lambda self: Point3D(*self._target._xyz),
+                      lambda self, value: object.__setattr__(self, '_target', Point3D(*value._xyz)))
+    upVector = property(lambda self: Vector3D(*self._upVector._xyz),
+                        lambda self, value: object.__setattr__(self, '_upVector', Vector3D(*value._xyz)))
+
+    del _field
+
+    @property
+    def viewExtents(self):
+        return self._extents[1]
+
+    def getExtents(self):
+        return True, self._extents[0], self._extents[1]
+
+    def setExtents(self, width, height):
+        self._extents = (width, height)
+        return True
+
+
+class Viewport(ApiObject):
+    def __init__(self, width=1600, height=900):
+        self._width = width
+        self._height = height
+        self._camera = Camera()
+        self._camera._aspectRatio = width / height
+        self._refreshes = 0
+
+    width = property(lambda self: self._width)
+    height = property(lambda self: self._height)
+
+    @property
+    def camera(self):
+        return self._camera._copy()
+
+    @camera.setter
+    def camera(self, value):
+        camera = value._copy()
+        camera._isFitView = False
+        self._camera = camera
+        Application._get()._camera_changed(self)
+
+    def refresh(self):
+        self._refreshes += 1
+        return True
+
+    def fit(self):
+        return True
+
+
+# Command definitions, commands and inputs
+
+class ListItem(ApiObject):
+    def __init__(self, name, isSelected):
+        self._name = name
+        self._isSelected = isSelected
+
+    name = property(lambda self: self._name)
+
+    @property
+    def isSelected(self):
+        return self._isSelected
+
+    @isSelected.setter
+    def isSelected(self, value):
+        self._isSelected = value
+
+
+class ListItems(ApiCollection):
+    def add(self, name, isSelected, icon='', beforeIndex=-1):
+        item = ListItem(name, isSelected)
+        self._items.append(item)
+        return item
+
+
+class CommandInput(ApiObject):
+    def __init__(self, input_id, name):
+        self._id = input_id
+        self._name = name
+        self._isVisible = True
+        self._isEnabled = True
+
+    id = property(lambda self: self._id)
+    name = property(lambda self: self._name)
+
+    @property
+    def isVisible(self):
+        return self._isVisible
+
+    @isVisible.setter
+    def isVisible(self, value):
+        self._isVisible = value
+
+    @property
+    def isEnabled(self):
+        return self._isEnabled
+
+    @isEnabled.setter
+    def isEnabled(self, value):
+        self._isEnabled = value
+
+    def _set(self, value):
+        self._value = value
+
+
+class ValueCommandInput(CommandInput):
+    def __init__(self, input_id, name, value):
+        super().__init__(input_id, name)
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+
+class StringValueCommandInput(ValueCommandInput):
+    pass
+
+
+class BoolValueCommandInput(ValueCommandInput):
+    pass
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, input_id, name):
+        super().__init__(input_id, name)
+        self._listItems = ListItems()
+
+    listItems = property(lambda self: self._listItems)
+
+    @property
+    def selectedItem(self):
+        for item in self._listItems._items:
+            if item._isSelected:
+                return item
+        return None
+
+    def _set(self, value):
+        """
+        Harness helper: select the item called value, or each of a list of
+        names for a check box drop-down.
+        """
+        names = value if isinstance(value, (list, tuple)) else [value]
+        for item in self._listItems._items:
+            item._isSelected = item._name in names
+
+
+class Selection(ApiObject):
+    def __init__(self, entity):
+        self._entity = entity
+
+    entity = property(lambda self: self._entity)
+
+
+class SelectionCommandInput(CommandInput):
+    def __init__(self, input_id, name, commandPrompt):
+        super().__init__(input_id, name)
+        self._commandPrompt = commandPrompt
+        self._filters = []
+        self._limits = (1, 1)
+        self._selections = []
+
+    selectionCount = property(lambda self: len(self._selections))
+
+    def selection(self, index):
+        return self._selections[index]
+
+    def addSelectionFilter(self, filter):
+        self._filters.append(filter)
+        return True
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        self._limits = (minimum, maximum)
+        return True
+
+    def clearSelection(self):
+        self._selections = []
+        return True
+
+    def _set(self, value):
+        """
+        Harness helper: select each entity in a list.
+        """
+        self._selections = [Selection(entity) for entity in value]
+
+
+class CommandInputs(ApiCollection):
+    def _add(self, command_input):
+        self._items.append(command_input)
+        return command_input
+
+    def addStringValueInput(self, input_id, name, initialValue=''):
+        return self._add(StringValueCommandInput(input_id, name, initialValue))
+
+    def addBoolValueInput(self, input_id, name, isCheckBox, resourceFolder='', initialValue=False):
+        return self._add(BoolValueCommandInput(input_id, name, initialValue))
+
+    def addDropDownCommandInput(self, input_id, name, dropDownStyle):
+        return self._add(DropDownCommandInput(input_id, name))
+
+    def addSelectionInput(self, input_id, name, commandPrompt):
+        return self._add(SelectionCommandInput(input_id, name, commandPrompt))
+
+
+class Command(ApiObject):
+    def __init__(self, definition):
+        self._parentCommandDefinition = definition
+        self._commandInputs = CommandInputs()
+        self._execute = Event()
+        self._destroy = Event()
+        self._inputChanged = Event()
+        self._validateInputs = Event()
+        self._isAutoExecute = False
+
+    parentCommandDefinition = property(lambda self: self._parentCommandDefinition)
+    commandInputs = property(lambda self: self._commandInputs)
+    execute = property(lambda self: self._execute)
+    destroy = property(lambda self: self._destroy)
+    inputChanged = property(lambda self: self._inputChanged)
+    validateInputs = property(lambda self: self._validateInputs)
+
+    @property
+    def isAutoExecute(self):
+        return self._isAutoExecute
+
+    @isAutoExecute.setter
+    def isAutoExecute(self, value):
+        self._isAutoExecute = value
+
+
+class CommandDefinition(ApiObject):
+    def __init__(self, ui, cmd_id, name, tooltip, resourceFolder):
+        self._ui = ui
+        self._id = cmd_id
+        self._name = name
+        self._tooltip = tooltip
+        self._resourceFolder = resourceFolder
+        self._commandCreated = Event()
+        self._next_inputs = {}
+
+    id = property(lambda self: self._id)
+    commandCreated = property(lambda self: self._commandCreated)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    @property
+    def tooltip(self):
+        return self._tooltip
+
+    @tooltip.setter
+    def tooltip(self, value):
+        self._tooltip = value
+
+    @property
+    def resourceFolder(self):
+        return self._resourceFolder
+
+    @resourceFolder.setter
+    def resourceFolder(self, value):
+        self._resourceFolder = value
+
+    def _set_next_inputs(self, values):
+        """
+        Harness helper: values applied to the command inputs, by id, before
+        the execute event of the next run fires.
+        """
+        self._next_inputs = dict(values)
+
+    def execute(self, inputs=None):
+        """
+        Runs the whole command synchronously: created, execute, destroy and
+        the application's commandTerminated event.
+        """
+        command = Command(self)
+        self._commandCreated._fire(EventArgs(command=command))
+        for input_id, value in self._next_inputs.items():
+            command_input = command._commandInputs.itemById(input_id)
+            if command_input:
+                command_input._set(value)
+        self._next_inputs = {}
+        command._execute._fire(EventArgs(command=command))
+        command._destroy._fire(EventArgs(command=command))
+        self._ui._commandTerminated._fire(EventArgs(
+            commandId=self._id,
+            commandDefinition=self,
+            terminationReason=CommandTerminationReason.CompletedTerminationReason))
+        return True
+
+    def deleteMe(self):
+        self._ui._commandDefinitions._items.remove(self)
+        self._deleted = True
+        return True
+
+
+class CommandDefinitions(ApiCollection):
+    def __init__(self, ui):
+        super().__init__()
+        self._ui = ui
+
+    def addButtonDefinition(self, cmd_id, name, tooltip, resourceFolder=''):
+        if any(item._id == cmd_id for item in self._items):
+            raise RuntimeError(f'3 : command definition "{cmd_id}" already exists')
+        definition = CommandDefinition(self._ui, cmd_id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+
+# Toolbars
+
+class CommandControl(ApiObject):
+    def __init__(self, controls, definition, control_id):
+        self._controls = controls
+        self._commandDefinition = definition
+        self._id = control_id
+        self._isPromoted = False
+        self._isPromotedByDefault = False
+        self._isVisible = True
+
+    id = property(lambda self: self._id)
+    commandDefinition = property(lambda self: self._commandDefinition)
+
+    @property
+    def isPromoted(self):
+        return self._isPromoted
+
+    @isPromoted.setter
+    def isPromoted(self, value):
+        self._isPromoted = value
+        self._controls._layouts += 1
+
+    @property
+    def isPromotedByDefault(self):
+        return self._isPromotedByDefault
+
+    @isPromotedByDefault.setter
+    def isPromotedByDefault(self, value):
+        self._isPromotedByDefault = value
+
+    @property
+    def isVisible(self):
+        return self._isVisible
+
+    @isVisible.setter
+    def isVisible(self, value):
+        self._isVisible = value
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        self._controls._layouts += 1
+        self._deleted = True
+        return True
+
+
+class ToolbarControls(ApiCollection):
+    def __init__(self):
+        super().__init__()
+        # Number of times the toolbar had to be laid out again
+        self._layouts = 0
+
+    def addCommand(self, commandDefinition, positionID='', isBefore=False):
+        control = CommandControl(self, commandDefinition, commandDefinition._id)
+        self._items.append(control)
+        self._layouts += 1
+        return control
+
+
+class ToolbarPanel(ApiObject):
+    def __init__(self, panel_id):
+        self._id = panel_id
+        self._controls = ToolbarControls()
+
+    id = property(lambda self: self._id)
+    controls = property(lambda self: self._controls)
+
+
+class ToolbarPanels(ApiCollection):
+    pass
+
+
+class ToolbarTab(ApiObject):
+    def __init__(self, tab_id, panel_ids):
+        self._id = tab_id
+        self._toolbarPanels = ToolbarPanels(ToolbarPanel(panel_id) for panel_id in panel_ids)
+
+    id = property(lambda self: self._id)
+    toolbarPanels = property(lambda self: self._toolbarPanels)
+
+
+class ToolbarTabs(ApiCollection):
+    pass
+
+
+class Workspace(ApiObject):
+    def __init__(self, workspace_id):
+        self._id = workspace_id
+
+    id = property(lambda self: self._id)
+
+
+# Dialogs
+
+class ProgressDialog(ApiObject):
+    def __init__(self):
+        self._isShowing = False
+        self._wasCancelled = False
+        self._cancel_after = None
+        self._progressValue = 0
+        self._maximumValue = 0
+        self._isCancelButtonShown = False
+
+    @property
+    def isCancelButtonShown(self):
+        return self._isCancelButtonShown
+
+    @isCancelButtonShown.setter
+    def isCancelButtonShown(self, value):
+        self._isCancelButtonShown = value
+
+    @property
+    def progressValue(self):
+        return self._progressValue
+
+    @progressValue.setter
+    def progressValue(self, value):
+        self._progressValue = value
+
+    @property
+    def maximumValue(self):
+        return self._maximumValue
+
+    @maximumValue.setter
+    def maximumValue(self, value):
+        self._maximumValue = value
+
+    @property
+    def wasCancelled(self):
+        return self._wasCancelled
+
+    @property
+    def isShowing(self):
+        return self._isShowing
+
+    def show(self, title, message, minimumValue, maximumValue, delay=0):
+        self._isShowing = True
+        self._maximumValue = maximumValue
+        return True
+
+    def hide(self):
+        self._isShowing = False
+        return True
+
+
+class FileDialog(ApiObject):
+    def __init__(self, ui):
+        self._ui = ui
+        object.__setattr__(self, 'title', '')
+        object.__setattr__(self, 'filter', '')
+        object.__setattr__(self, 'isMultiSelectEnabled', False)
+        object.__setattr__(self, 'initialFilename', '')
+        self._filename = ''
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @filename.setter
+    def filename(self, value):
+        self._filename = value
+
+    def showOpen(self):
+        return self._show()
+
+    def showSave(self):
+        return self._show()
+
+    def _show(self):
+        if not self._ui._file_responses:
+            return DialogResults.DialogCancel
+        self._filename = self._ui._file_responses.pop(0)
+        return DialogResults.DialogOK
+
+
+# User interface and application
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self._commandDefinitions = CommandDefinitions(self)
+        self._allToolbarTabs = ToolbarTabs([
+            ToolbarTab('SolidTab', ['SolidCreatePanel', 'SelectPanel', 'InspectPanel']),
+        ])
+        self._workspaceActivated = Event()
+        self._commandTerminated = Event()
+        self._activeWorkspace = Workspace('FusionSolidEnvironment')
+        self._messages = []
+        self._input_responses = []
+        # Harness: answers to message boxes with buttons other than OK,
+        # popped in order; Yes when empty
+        self._message_responses = []
+        self._file_responses = []
+        self._progress_dialogs = []
+
+    commandDefinitions = property(lambda self: self._commandDefinitions)
+    allToolbarTabs = property(lambda self: self._allToolbarTabs)
+    workspaceActivated = property(lambda self: self._workspaceActivated)
+    commandTerminated = property(lambda self: self._commandTerminated)
+    activeWorkspace = property(lambda self: self._activeWorkspace)
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self._messages.append(text)
+        if buttons == MessageBoxButtonTypes.OKButtonType:
+            return DialogResults.DialogOK
+        if not self._message_responses:
+            return DialogResults.DialogYes
+        return self._message_responses.pop(0)
+
+    def inputBox(self, prompt, title='', defaultValue=''):
+        if not self._input_responses:
+            return defaultValue, True
+        return self._input_responses.pop(0), False
+
+    def createFileDialog(self):
+        return FileDialog(self)
+
+    def createProgressDialog(self):
+        dialog = ProgressDialog()
+        self._progress_dialogs.append(dialog)
+        return dialog
+
+    def _activate_workspace(self, workspace_id):
+        """
+        Harness helper: switch workspace and fire workspaceActivated.
+        """
+        self._activeWorkspace = Workspace(workspace_id)
+        self._workspaceActivated._fire(EventArgs(workspace=self._activeWorkspace))
+
+
+class CustomEvent(Event):
+    def __init__(self, event_id):
+        super().__init__()
+        self._eventId = event_id
+
+    eventId = property(lambda self: self._eventId)
+
+
+class Document(ApiObject):
+    """
+    A fake document holding one design and one viewport.
+    """
+    _next_id = 1
+
+    def __init__(self, name, design=None, viewport=None):
+        self._name = name
+        self._creationId = f'doc-{Document._next_id}'
+        Document._next_id += 1
+        self._design = design
+        self._viewport = viewport or Viewport()
+        self._dataFile = None
+        self._isModified = False
+        if design is not None:
+            design._parentDocument = self
+
+    name = property(lambda self: self._name)
+    creationId = property(lambda self: self._creationId)
+    dataFile = property(lambda self: self._dataFile)
+    isModified = property(lambda self: self._isModified)
+    design = property(lambda self: self._design)
+
+    @property
+    def products(self):
+        return ApiCollection([self._design] if self._design else [])
+
+    def activate(self):
+        app = Application._get()
+        app._activeDocument = self
+        app._documentActivated._fire(EventArgs(document=self))
+        return True
+
+    def _save(self):
+        """
+        Harness helper: save the document as a new version.
+        """
+        if self._dataFile is None:
+            self._dataFile = DataFile(f'urn:file:{self._creationId}', 0)
+        self._dataFile._versionNumber += 1
+        self._isModified = False
+        Application._get()._documentSaved._fire(EventArgs(document=self))
+        return True
+
+    def close(self, saveChanges=False):
+        app = Application._get()
+        app._documentClosing._fire(EventArgs(document=self))
+        app._documents._items.remove(self)
+        if app._activeDocument is self:
+            app._activeDocument = app._documents._items[0] if app._documents._items else None
+        self._deleted = True
+        return True
+
+
+class DataFile(ApiObject):
+    def __init__(self, file_id, versionNumber=1):
+        self._id = file_id
+        self._versionNumber = versionNumber
+
+    id = property(lambda self: self._id)
+    versionNumber = property(lambda self: self._versionNumber)
+
+
+class Documents(ApiCollection):
+    pass
+
+
+class Application(ApiObject):
+    _instance = None
+
+    def __init__(self):
+        self._userInterface = UserInterface()
+        self._documents = Documents()
+        self._activeDocument = None
+        self._customEvents = {}
+        self._event_queue = []
+        self._documentClosing = Event()
+        self._documentSaved = Event()
+        self._documentActivated = Event()
+        self._documentOpened = Event()
+        self._cameraChanged = Event()
+        self._log = []
+
+    @staticmethod
+    def get():
+        adsk.api_calls['Application.get'] += 1
+        return Application._get()
+
+    @staticmethod
+    def _get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @staticmethod
+    def _reset():
+        """
+        Harness helper: start again with a fresh application.
+        """
+        Application._instance = None
+
+    userInterface = property(lambda self: self._userInterface)
+    documents = property(lambda self: self._documents)
+    documentClosing = property(lambda self: self._documentClosing)
+    documentSaved = property(lambda self: self._documentSaved)
+    documentActivated = property(lambda self: self._documentActivated)
+    documentOpened = property(lambda self: self._documentOpened)
+    cameraChanged = property(lambda self: self._cameraChanged)
+
+    @property
+    def activeDocument(self):
+        return self._activeDocument
+
+    @property
+    def activeProduct(self):
+        return self._activeDocument._design if self._activeDocument else None
+
+    @property
+    def activeViewport(self):
+        if not self._activeDocument:
+            raise RuntimeError('2 : InternalValidationError : viewport')
+        return self._activeDocument._viewport
+
+    def registerCustomEvent(self, event_id):
+        if event_id not in self._customEvents:
+            self._customEvents[event_id] = CustomEvent(event_id)
+        return self._customEvents[event_id]
+
+    def unregisterCustomEvent(self, event_id):
+        return self._customEvents.pop(event_id, None) is not None
+
+    def fireCustomEvent(self, event_id, additionalInfo=''):
+        if event_id not in self._customEvents:
+            return False
+        self._event_queue.append((event_id, additionalInfo))
+        return True
+
+    def log(self, message, level=LogLevels.InfoLogLevel, type=LogTypes.ConsoleLogType):
+        self._log.append(message)
+
+    def _process_events(self, limit=1000000):
+        """
+        Harness helper: deliver queued custom events, like Fusion's message
+        loop does between UI frames. Returns the number delivered.
+        """
+        delivered = 0
+        while self._event_queue and delivered < limit:
+            event_id, info = self._event_queue.pop(0)
+            event = self._customEvents.get(event_id)
+            if event:
+                event._fire(EventArgs(firingEvent=event, additionalInfo=info))
+            delivered += 1
+        return delivered
+
+    def _camera_changed(self, viewport):
+        self._cameraChanged._fire(EventArgs(viewport=viewport))
+
+    def _open(self, document):
+        """
+        Harness helper: add a document and make it the active one.
+        """
+        self._documents._items.append(document)
+        self._documentOpened._fire(EventArgs(document=document))
+        document.activate()
+        return document
+
+
+class Attribute(ApiObject):
+    def __init__(self, attributes, groupName, name, value):
+        self._attributes = attributes
+        self._groupName = groupName
+        self._name = name
+        self._value = value
+
+    groupName = property(lambda self: self._groupName)
+    name = property(lambda self: self._name)
+    parent = property(lambda self: self._attributes._parent)
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def deleteMe(self):
+        self._attributes._items.remove(self)
+        self._deleted = True
+        return True
+
+
+class Attributes(ApiCollection):
+    def __init__(self, parent):
+        super().__init__()
+        self._parent = parent
+
+    def add(self, groupName, name, value):
+        for attribute in self._items:
+            if attribute._groupName == groupName and attribute._name == name:
+                attribute._value = value
+                return attribute
+        attribute = Attribute(self, groupName, name, value)
+        self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, groupName, name):
+        for attribute in self._items:
+            if attribute._groupName == groupName and attribute._name == name:
+                return attribute
+        return None
+
+
+class Appearance(ApiObject):
+    def __init__(self, name, appearance_id):
+        self._name = name
+        self._id = appearance_id
+
+    name = property(lambda self: self._name)
+    id = property(lambda self: self._id)
+
+
+class Appearances(ApiCollection):
+    def itemByName(self, name):
+        for appearance in self._items:
+            if appearance._name == name:
+                return appearance
+        return None
+
+
+class ObjectCollection(ApiCollection):
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def clear(self):
+        self._items = []
+        return True
@@ -0,0 +1,495 @@
+"""
+Fake adsk.fusion: designs, components, occurrences, bodies, sketches,
+construction planes, joints and selection sets.
+
+Occurrences returned by allOccurrences and childOccurrences are in the
+context of the root component, like the real API's occurrence proxies, and
+are created once per path so the same path always gives the same object.
+"""
+
+from . import core
+from .core import ApiObject, ApiCollection
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class Timeline(ApiObject):
+    """
+    A timeline of anonymous features, with a movable marker.
+    """
+    def __init__(self):
+        self._count = 0
+        self._markerPosition = 0
+
+    count = property(lambda self: self._count)
+
+    @property
+    def markerPosition(self):
+        return self._markerPosition
+
+    @markerPosition.setter
+    def markerPosition(self, value):
+        self._markerPosition = value
+
+
+class ComponentEntity(ApiObject):
+    """
+    Base for the named entities a component holds (bodies, sketches,
+    construction planes, joints); a native entity when _context is None,
+    otherwise a proxy in the context of the occurrence _context.
+    """
+    # Token prefix and key of the component collection holding the entity
+    _kind = None
+
+    def __init__(self, component, index, name, native=None, context=None):
+        self._component = component
+        self._index = index
+        self._name = name
+        self._native = native
+        self._context = context
+
+    def _native_entity(self):
+        return self._native if self._native is not None else self
+
+    @property
+    def name(self):
+        return self._native_entity()._name
+
+    @name.setter
+    def name(self, value):
+        self._native_entity()._name = value
+        # A rename changes the document but adds no timeline feature
+        self._component._design._edit(feature=False)
+
+    @property
+    def entityToken(self):
+        token = f'{self._kind}:{self._component._id}:{self._index}'
+        if self._context is not None:
+            token += '@' + self._context._path
+        return token
+
+    @property
+    def isValid(self):
+        entity = self._native_entity()
+        return not getattr(entity, '_deleted', False) and \
+            (self._context is None or not getattr(self._context, '_deleted', False))
+
+    parentComponent = property(lambda self: self._component)
+    assemblyContext = property(lambda self: self._context)
+
+    # Light bulb, visibility and appearance belong to the native entity
+    @property
+    def isLightBulbOn(self):
+        return getattr(self._native_entity(), '_isLightBulbOn', True)
+
+    @isLightBulbOn.setter
+    def isLightBulbOn(self, value):
+        self._native_entity()._isLightBulbOn = value
+
+    @property
+    def isVisible(self):
+        return self.isLightBulbOn and (self._context is None or self._context._is_shown())
+
+    @property
+    def appearance(self):
+        return getattr(self._native_entity(), '_appearance', None)
+
+    @appearance.setter
+    def appearance(self, value):
+        self._native_entity()._appearance = value
+
+    @property
+    def attributes(self):
+        # Attributes live on the native entity, whichever proxy is used
+        entity = self._native_entity()
+        if not hasattr(entity, '_attributes'):
+            entity._attributes = core.Attributes(entity)
+        return entity._attributes
+
+    @property
+    def nativeObject(self):
+        return self._native
+
+    def createForAssemblyContext(self, occurrence):
+        return type(self)(self._component, self._index, None,
+                          native=self._native_entity(), context=occurrence)
+
+    def deleteMe(self):
+        entity = self._native_entity()
+        entity._deleted = True
+        entity._component._entities[self._kind]._items.remove(entity)
+        entity._component._design._edit()
+        return True
+
+
+class BRepBody(ComponentEntity):
+    _kind = 'body'
+
+
+class BRepBodies(ApiCollection):
+    pass
+
+
+class Sketch(ComponentEntity):
+    _kind = 'sketch'
+
+
+class Sketches(ApiCollection):
+    pass
+
+
+class ConstructionPlane(ComponentEntity):
+    _kind = 'constructionPlane'
+
+
+class ConstructionPlanes(ApiCollection):
+    pass
+
+
+class Joint(ComponentEntity):
+    _kind = 'joint'
+
+
+class Joints(ApiCollection):
+    pass
+
+
+# Entity class and collection class for each kind of component entity
+ENTITY_KINDS = {
+    'body': (BRepBody, BRepBodies),
+    'sketch': (Sketch, Sketches),
+    'constructionPlane': (ConstructionPlane, ConstructionPlanes),
+    'joint': (Joint, Joints),
+}
+
+
+class Occurrence(ApiObject):
+    """
+    An occurrence in the context of the root component.
+    """
+    def __init__(self, design, parent, name, component):
+        self._design = design
+        self._parent = parent
+        self._name = name
+        self._component = component
+        self._path = name if parent is None else parent._path + '+' + name
+        self._children = None
+
+    name = property(lambda self: self._name)
+    component = property(lambda self: self._component)
+    fullPathName = property(lambda self: self._path)
+    assemblyContext = property(lambda self: self._parent)
+
+    @property
+    def entityToken(self):
+        return 'occ:' + self._path
+
+    @property
+    def isValid(self):
+        return not getattr(self, '_deleted', False)
+
+    @property
+    def childOccurrences(self):
+        return Occurrences(self._child_list())
+
+    @property
+    def isLightBulbOn(self):
+        return self._design._occurrence_state.get(self._path, {}).get('isLightBulbOn', True)
+
+    @isLightBulbOn.setter
+    def isLightBulbOn(self, value):
+        self._design._occurrence_state.setdefault(self._path, {})['isLightBulbOn'] = value
+
+    @property
+    def isVisible(self):
+        return self._is_shown()
+
+    @property
+    def appearance(self):
+        return self._design._occurrence_state.get(self._path, {}).get('appearance')
+
+    @appearance.setter
+    def appearance(self, value):
+        self._design._occurrence_state.setdefault(self._path, {})['appearance'] = value
+
+    def _is_shown(self):
+        occ = self
+        while occ is not None:
+            if not occ._design._occurrence_state.get(occ._path, {}).get('isLightBulbOn', True):
+                return False
+            occ = occ._parent
+        return True
+
+    def _child_list(self):
+        if self._children is None:
+            self._children = [Occurrence(self._design, self, name, component)
+                              for name, component in self._component._occurrence_defs]
+        return self._children
+
+
+class Occurrences(ApiCollection):
+    pass
+
+
+class OccurrenceList(ApiCollection):
+    pass
+
+
+class Component(ApiObject):
+    def __init__(self, design, comp_id, name):
+        self._design = design
+        self._id = comp_id
+        self._name = name
+        self._entities = {kind: collection() for kind, (_, collection) in ENTITY_KINDS.items()}
+        # (occurrence name, component) for each occurrence in this component
+        self._occurrence_defs = []
+
+    id = property(lambda self: self._id)
+    bRepBodies = property(lambda self: self._entities['body'])
+    sketches = property(lambda self: self._entities['sketch'])
+    constructionPlanes = property(lambda self: self._entities['constructionPlane'])
+    joints = property(lambda self: self._entities['joint'])
+    parentDesign = property(lambda self: self._design)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+
+    @property
+    def occurrences(self):
+        return Occurrences(self._design._root_context(self))
+
+    @property
+    def allOccurrences(self):
+        return OccurrenceList(self._design._all_in_context(self))
+
+    def allOccurrencesByComponent(self, component):
+        return OccurrenceList(occ for occ in self._design._all_in_context(self)
+                              if occ._component is component)
+
+    def _add_entity(self, kind, name):
+        """
+        Harness helper: add a native entity of a kind in ENTITY_KINDS.
+        """
+        entity_class, _ = ENTITY_KINDS[kind]
+        items = self._entities[kind]._items
+        entity = entity_class(self, items[-1]._index + 1 if items else 0, name)
+        items.append(entity)
+        self._design._edit()
+        return entity
+
+    def _add_body(self, name):
+        """
+        Harness helper: add a native body to the component.
+        """
+        return self._add_entity('body', name)
+
+    def _add_occurrence(self, component):
+        """
+        Harness helper: add an occurrence of component to this component.
+        """
+        count = sum(1 for _, c in self._occurrence_defs if c is component) + 1
+        self._occurrence_defs.append((f'{component._name}:{count}', component))
+        self._design._edit()
+
+
+class SelectionSet(ApiObject):
+    def __init__(self, selection_sets, name, entities):
+        self._selectionSets = selection_sets
+        self._name = name
+        self._entities = list(entities)
+        self._attributes = core.Attributes(self)
+
+    attributes = property(lambda self: self._attributes)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        self._selectionSets._modified()
+
+    @property
+    def entities(self):
+        return list(self._entities)
+
+    @entities.setter
+    def entities(self, value):
+        self._entities = list(value)
+        self._selectionSets._modified()
+
+    def select(self):
+        return True
+
+    def deleteMe(self):
+        self._selectionSets._items.remove(self)
+        self._deleted = True
+        self._selectionSets._modified()
+        return True
+
+
+class SelectionSets(ApiCollection):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+
+    def add(self, entities, name=''):
+        selection_set = SelectionSet(self, name or f'Selection Set{len(self._items) + 1}', entities)
+        self._items.append(selection_set)
+        self._modified()
+        return selection_set
+
+    def _modified(self):
+        # Selection sets are saved with the document, so changing one gives
+        # it unsaved changes, as in Fusion
+        document = self._design._parentDocument
+        if document is not None:
+            document._isModified = True
+
+    def itemByName(self, name):
+        for selection_set in self._items:
+            if selection_set._name == name:
+                return selection_set
+        return None
+
+
+class Design(ApiObject):
+    def __init__(self):
+        self._parentDocument = None
+        self._components = []
+        self._components_by_id = {}
+        self._rootComponent = self._new_component('Root')
+        self._selectionSets = SelectionSets(self)
+        self._appearances = core.Appearances()
+        self._designType = DesignTypes.ParametricDesignType
+        self._timeline = Timeline()
+        # Occurrence path -> light bulb and appearance, kept by path so they
+        # survive the occurrence objects being recreated after an edit
+        self._occurrence_state = {}
+        self._roots = None
+        self._flat = None
+        self._by_path = None
+        self._edits = 0
+
+    rootComponent = property(lambda self: self._rootComponent)
+    selectionSets = property(lambda self: self._selectionSets)
+    appearances = property(lambda self: self._appearances)
+    designType = property(lambda self: self._designType)
+    timeline = property(lambda self: self._timeline)
+    parentDocument = property(lambda self: self._parentDocument)
+
+    @property
+    def allComponents(self):
+        return ApiCollection(self._components)
+
+    def findAttributes(self, groupName, attributeName):
+        return [attribute
+                for component in self._components
+                for collection in component._entities.values()
+                for entity in collection._items
+                for attribute in getattr(entity, '_attributes', core.Attributes(entity))._items
+                if attribute._groupName == groupName and attribute._name == attributeName]
+
+    def findEntityByToken(self, entityToken):
+        entity = self._resolve_token(entityToken)
+        return [entity] if entity is not None and not getattr(entity, '_deleted', False) else []
+
+    def _new_component(self, name):
+        """
+        Harness helper: create a new component in the design.
+        """
+        component = Component(self, f'comp-{len(self._components)}', name)
+        self._components.append(component)
+        self._components_by_id[component._id] = component
+        return component
+
+    def _add_appearance(self, name):
+        """
+        Harness helper: add an appearance to the design.
+        """
+        appearance = core.Appearance(name, f'appearance-{len(self._appearances._items)}')
+        self._appearances._items.append(appearance)
+        return appearance
+
+    def _edit(self, feature=True):
+        """
+        Harness helper: record a model change, dropping cached occurrences.
+        A feature edit also adds a timeline feature at the marker.
+        """
+        self._edits += 1
+        if feature:
+            self._timeline._count += 1
+            self._timeline._markerPosition = self._timeline._count
+        self._roots = None
+        self._flat = None
+        self._by_path = None
+        if self._parentDocument is not None:
+            self._parentDocument._isModified = True
+
+    def _root_context(self, component):
+        if component is self._rootComponent:
+            if self._roots is None:
+                self._roots = [Occurrence(self, None, name, child)
+                               for name, child in component._occurrence_defs]
+            return self._roots
+        return [occ for occ in self._all_in_context(self._rootComponent)
+                if occ._component is component][0]._child_list()
+
+    def _all_in_context(self, component):
+        if component is not self._rootComponent:
+            result = []
+            for occ in self._all_in_context(self._rootComponent):
+                if occ._component is component:
+                    stack = list(reversed(occ._child_list()))
+                    while stack:
+                        child = stack.pop()
+                        result.append(child)
+                        stack.extend(reversed(child._child_list()))
+                    break
+            return result
+
+        if self._flat is None:
+            flat = []
+            stack = list(reversed(self._root_context(component)))
+            while stack:
+                occ = stack.pop()
+                flat.append(occ)
+                stack.extend(reversed(occ._child_list()))
+            self._flat = flat
+        return self._flat
+
+    def _resolve_token(self, token):
+        if token.startswith('occ:'):
+            if self._by_path is None:
+                self._by_path = {occ._path: occ for occ in self._all_in_context(self._rootComponent)}
+            return self._by_path.get(token[4:])
+
+        kind, _, rest = token.partition(':')
+        if kind in ENTITY_KINDS:
+            entity_part, _, path = rest.partition('@')
+            comp_id, _, index = entity_part.rpartition(':')
+            component = self._components_by_id.get(comp_id)
+            if component is None:
+                return None
+            entity = next((e for e in component._entities[kind]._items if e._index == int(index)), None)
+            if entity is None or not path:
+                return entity
+            occurrence = self._resolve_token('occ:' + path)
+            if occurrence is None:
+                return None
+            return type(entity)(component, entity._index, None, native=entity, context=occurrence)
+
+        return None
+
+
+class FusionDocument(core.Document):
+    pass
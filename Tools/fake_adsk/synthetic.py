@@ -0,0 +1,81 @@
+"""
+Synthetic assemblies for the fake adsk API.
+
+build_design() lays out a two-level assembly: the root holds subassembly
+groups and each group holds leaf part occurrences. Leaf components are
+reused according to instances_per_component, so the same total occurrence
+count can model a design of unique parts (1) or a fastener-heavy design
+(hundreds of instances per part). Each leaf component also has a sketch and
+each group a construction plane and a joint.
+"""
+
+import adsk.core
+import adsk.fusion
+
+# Body names are drawn from these bases with a size suffix, e.g. "Bolt M6"
+BODY_BASES = ('Bolt', 'Nut', 'Washer', 'Bracket', 'Plate', 'Shaft', 'Spacer', 'Pin')
+BODY_SIZES = (4, 6, 8, 10, 12)
+
+
+def body_name(component_index, body_index):
+    """
+    Return the name of a body in a leaf component.
+    """
+    base = BODY_BASES[(component_index + body_index) % len(BODY_BASES)]
+    size = BODY_SIZES[component_index % len(BODY_SIZES)]
+    return f'{base} M{size}'
+
+
+def build_design(occurrences=1000, instances_per_component=10, bodies_per_component=2,
+                 group_size=50):
+    """
+    Build a fake design with about the given number of occurrences.
+
+    Args:
+        occurrences (int): Total occurrences, groups and leaves together
+        instances_per_component (int): Average leaf occurrences per leaf component
+        bodies_per_component (int): Bodies in each leaf component
+        group_size (int): Leaf occurrences per subassembly group
+    Returns:
+        adsk.fusion.Design: The design, not yet attached to a document
+    """
+    design = adsk.fusion.Design()
+    root = design._rootComponent
+    root._add_body('Frame')
+    design._add_appearance('Steel - Satin')
+    design._add_appearance('Paint - Enamel Glossy (Red)')
+
+    group_count = max(1, occurrences // (group_size + 1))
+    leaf_count = max(0, occurrences - group_count)
+    leaf_component_count = max(1, -(-leaf_count // max(1, instances_per_component)))
+
+    leaf_components = []
+    for i in range(leaf_component_count):
+        component = design._new_component(f'Part {i}')
+        for j in range(bodies_per_component):
+            component._add_body(body_name(i, j))
+        component._add_entity('sketch', f'Profile {i}')
+        leaf_components.append(component)
+
+    groups = []
+    for i in range(group_count):
+        group = design._new_component(f'Group {i}')
+        group._add_body('Mount Plate')
+        group._add_entity('constructionPlane', 'Mount Plane')
+        group._add_entity('joint', 'Mount Joint')
+        root._add_occurrence(group)
+        groups.append(group)
+
+    for i in range(leaf_count):
+        groups[i % group_count]._add_occurrence(leaf_components[i % leaf_component_count])
+
+    return design
+
+
+def open_design(design, name='Synthetic Assembly', width=1600, height=900):
+    """
+    Wrap a design in a document, make it active and return the document.
+    """
+    app = adsk.core.Application._get()
+    document = adsk.fusion.FusionDocument(name, design, adsk.core.Viewport(width, height))
+    return app._open(document)
@@ -0,0 +1,128 @@
+"""
+Search assembly snapshots written by the SelectionSets add-in's Export
+Assembly Snapshot command, to find which designs contain entities with a
+given name without opening them in Fusion.
+
+Snapshot files, or folders searched recursively for them, are read and
+searched in parallel on a pool of worker processes. Names are matched with
+the add-in's own rules:
+
+    python Tools/query_snapshots.py "Bolt M6" snapshots/
+    python Tools/query_snapshots.py "Bolt M*" snapshots/ --mode glob --ignore-case --paths
+    python Tools/query_snapshots.py "Bracket" a.asmsnap b.asmsnap --types body sketch
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+
+TOOLS_PATH = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TOOLS_PATH), 'AddIns'))
+
+from SelectionSets import assembly_snapshot
+from SelectionSets import name_matching
+
+
+def find_snapshots(paths):
+    """
+    Return the snapshot files named in paths, searching folders recursively.
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for folder, _, names in os.walk(path):
+            files.extend(os.path.join(folder, name) for name in sorted(names)
+                         if name.endswith(assembly_snapshot.FILE_EXTENSION))
+    return files
+
+
+def query_file(path, text, mode, ignore_case, entity_types):
+    """
+    Search one snapshot, run in a worker process.
+
+    Returns:
+        tuple: (path, document name, matches, error) where matches is a list
+        of (entity type, name, occurrence path) and error is None on success
+    """
+    try:
+        snapshot = assembly_snapshot.read(path)
+        pattern = name_matching.NamePattern(text, mode, ignore_case)
+        return path, snapshot.document.get('name', ''), snapshot.find(pattern, entity_types), None
+    except (OSError, ValueError) as e:
+        return path, '', [], str(e)
+
+
+def query_files(files, text, mode, ignore_case, entity_types, workers=None):
+    """
+    Search many snapshots, yielding query_file() results in the order of files.
+    """
+    arguments = ([text] * len(files), [mode] * len(files), [ignore_case] * len(files),
+                 [entity_types] * len(files))
+    if workers == 1:
+        yield from map(query_file, files, *arguments)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # Hand files out in batches so small snapshots don't cost a round
+        # trip to a worker each
+        chunksize = max(1, len(files) // ((workers or os.cpu_count() or 1) * 4))
+        yield from executor.map(query_file, files, *arguments, chunksize=chunksize)
+
+
+def print_result(document_name, path, matches, show_paths):
+    print(f'{document_name or os.path.basename(path)} ({path}): {len(matches)} ' +
+          f'{"match" if len(matches) == 1 else "matches"}')
+
+    counts = {}
+    for entity_type, name, _ in matches:
+        counts[(entity_type, name)] = counts.get((entity_type, name), 0) + 1
+    for (entity_type, name), count in sorted(counts.items()):
+        print(f'    {name} ({entity_type}): {count}')
+        if show_paths:
+            for match_type, match_name, occurrence_path in matches:
+                if (match_type, match_name) == (entity_type, name):
+                    print(f'        {occurrence_path or "(root)"}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('name', help='name, prefix, wildcard or regular expression to search for')
+    parser.add_argument('paths', nargs='+', help='snapshot files or folders of them')
+    parser.add_argument('--mode', choices=name_matching.MATCH_MODES, default=name_matching.EXACT,
+                        help='how the name is matched (default: exact)')
+    parser.add_argument('--ignore-case', action='store_true', help='compare names case-insensitively')
+    parser.add_argument('--types', nargs='+', choices=assembly_snapshot.ENTITY_TYPES,
+                        default=[assembly_snapshot.BODY],
+                        help='kinds of entity to search (default: body)')
+    parser.add_argument('--paths', dest='show_paths', action='store_true',
+                        help='list the occurrence path of every match')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU, 1 to search in this process)')
+    args = parser.parse_args()
+
+    try:
+        name_matching.NamePattern(args.name, args.mode, args.ignore_case)
+    except ValueError as e:
+        parser.error(str(e))
+
+    files = find_snapshots(args.paths)
+    matched = 0
+    failed = 0
+    for path, document_name, matches, error in query_files(
+            files, args.name, args.mode, args.ignore_case, tuple(args.types), args.workers):
+        if error:
+            failed += 1
+            print(error, file=sys.stderr)
+        elif matches:
+            matched += 1
+            print_result(document_name, path, matches, args.show_paths)
+
+    print(f'{matched} of {len(files)} {"design" if len(files) == 1 else "designs"} matched')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())